@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration for the web application
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:5000")
+
+# One process per core; threads let each worker overlap I/O-bound requests
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+
+# Import the app (and load the data) once in the master before forking,
+# so workers share the read-only DataFrames instead of each loading a copy
+preload_app = True
+
+timeout = 120
+keepalive = 5
@@ -4,6 +4,8 @@ Extracts and processes the real Amazon product data
 """
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import re
 from pathlib import Path
 import sys
@@ -324,6 +326,49 @@ class AmazonDataParser:
             'categories_file': categories_file if self.categories else None,
             'similar_products_file': similar_file if self.similar_products else None
         }
+    
+    def _write_sorted_parquet(self, records: List[Dict], name: str, sort_by: List[str],
+                              dictionary_columns: Optional[List[str]] = None) -> Path:
+        """
+        Write records to Parquet clustered on sort_by so row-group statistics are tight
+        
+        Columns listed in dictionary_columns are stored as dictionary arrays, which
+        pandas reads back as categoricals so filters on them compare integer codes.
+        """
+        df = pd.DataFrame(records)
+        
+        # Ids are parsed as strings; store them numerically as the CSV round-trip does
+        for id_column in ['id', 'product_id']:
+            if id_column in df.columns:
+                df[id_column] = pd.to_numeric(df[id_column], errors='coerce')
+        
+        df = df.sort_values(sort_by, na_position='last', kind='stable')
+        for column in dictionary_columns or []:
+            df[column] = df[column].astype('category')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        
+        file_path = PROCESSED_DATA_DIR / f"{name}.parquet"
+        pq.write_table(table, file_path, row_group_size=64_000, write_statistics=True, compression='zstd')
+        logger.info(f"Saved {len(df)} rows to {file_path} sorted by {sort_by}")
+        return file_path
+    
+    @timing_decorator
+    def save_to_parquet(self):
+        """Save parsed data to Parquet files sorted by their most filtered keys"""
+        logger.info("Saving parsed data to Parquet files...")
+        
+        PROCESSED_DATA_DIR.mkdir(parents=True, exist_ok=True)
+        
+        return {
+            'products_parquet': self._write_sorted_parquet(self.products, "amazon_products", ['group', 'salesrank'],
+                                                           dictionary_columns=['group']),
+            # Reviews are clustered by product only: the stable sort keeps each product's
+            # reviews in file order, which get_product_details' recent_reviews relies on
+            'reviews_parquet': self._write_sorted_parquet(self.reviews, "amazon_reviews", ['product_asin'],
+                                                          dictionary_columns=['product_asin', 'customer_id']) if self.reviews else None,
+            'categories_parquet': self._write_sorted_parquet(self.categories, "amazon_categories", ['product_id']) if self.categories else None,
+            'similar_products_parquet': self._write_sorted_parquet(self.similar_products, "amazon_similar_products", ['product_asin']) if self.similar_products else None
+        }
 
 
 def main():
@@ -340,8 +385,9 @@ def main():
     parser = AmazonDataParser()
     stats = parser.parse_amazon_file(AMAZON_META_EXTRACTED)
     
-    # Save to CSV files
+    # Save to CSV files, plus sorted Parquet copies used by the loaders
     files = parser.save_to_csv()
+    files.update(parser.save_to_parquet())
     
     # Print summary
     logger.info("=" * 50)
@@ -4,6 +4,7 @@ Analyzes co-purchasing patterns and user-item similarities
 """
 import pandas as pd
 import numpy as np
+from scipy.sparse import csr_matrix
 import sys
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Any
@@ -14,8 +15,9 @@ warnings.filterwarnings('ignore')
 # Add src to path to import our modules
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.helpers import setup_logging, timing_decorator
-from utils.config import PROCESSED_DATA_DIR, RECOMMENDER_CONFIG
+from utils.helpers import setup_logging, timing_decorator, load_processed_table
+from utils.config import RECOMMENDER_CONFIG
+from recommendation.scoring import user_similarities, accumulate_neighbours, co_purchase_counts
 
 logger = setup_logging()
 
@@ -34,17 +36,30 @@ class CollaborativeFilteringRecommender:
         self.reviews_df = None
         self.similar_products_df = None
         self.user_item_matrix = None
+        self.user_ids = None
+        self.item_ids = None
+        self._user_positions = {}
+        self.customer_categories = None
+        self.product_categories = None
+        self._customer_offsets = None
+        self._customer_products = None
+        self._product_offsets = None
+        self._product_customers = None
         self.product_similarity_matrix = None
         self.load_data()
         
     @timing_decorator
     def load_data(self):
-        """Load processed CSV data and prepare recommendation matrices"""
+        """Load processed data and prepare recommendation matrices"""
         try:
-            # Load all data files
-            self.products_df = pd.read_csv(PROCESSED_DATA_DIR / "amazon_products.csv")
-            self.reviews_df = pd.read_csv(PROCESSED_DATA_DIR / "amazon_reviews.csv")
-            self.similar_products_df = pd.read_csv(PROCESSED_DATA_DIR / "amazon_similar_products.csv")
+            # Load all data files, reading only the columns the recommender uses
+            self.products_df = load_processed_table("amazon_products", columns=[
+                'id', 'asin', 'title', 'group', 'salesrank', 'total_reviews', 'avg_rating'
+            ])
+            self.reviews_df = load_processed_table("amazon_reviews", columns=[
+                'customer_id', 'product_asin', 'rating', 'helpful'
+            ], categorical=['customer_id', 'product_asin'])
+            self.similar_products_df = load_processed_table("amazon_similar_products", columns=['product_asin', 'similar_asin'])
             
             self.logger.info(f"Loaded {len(self.products_df):,} products")
             self.logger.info(f"Loaded {len(self.reviews_df):,} reviews")
@@ -72,6 +87,9 @@ class CollaborativeFilteringRecommender:
             # Create product similarity mappings from co-purchase data
             self._create_product_similarity_data()
             
+            # Index the reviews by customer and by product
+            self._create_purchase_index()
+            
             self.logger.info("Recommendation data prepared successfully")
             
         except Exception as e:
@@ -96,13 +114,21 @@ class CollaborativeFilteringRecommender:
             (self.reviews_df['product_asin'].isin(popular_items))
         ]
         
-        # Create pivot table (user-item matrix)
-        self.user_item_matrix = filtered_reviews.pivot_table(
-            index='customer_id',
-            columns='product_asin', 
-            values='rating',
-            fill_value=0
+        # Average repeated ratings of the same item (as pivot_table did)
+        ratings = filtered_reviews.groupby(['customer_id', 'product_asin'], sort=False, observed=True)['rating'].mean().dropna()
+        user_codes, user_ids = pd.factorize(ratings.index.get_level_values('customer_id'), sort=True)
+        item_codes, item_ids = pd.factorize(ratings.index.get_level_values('product_asin'), sort=True)
+        
+        # Sparse user-item matrix (CSR) with rows aligned to user_ids and columns to item_ids;
+        # only non-zero ratings are stored, unrated items are implicit zeros
+        self.user_ids = np.asarray(user_ids, dtype=object)
+        self.item_ids = np.asarray(item_ids, dtype=object)
+        self.user_item_matrix = csr_matrix(
+            (ratings.to_numpy(dtype=np.float64), (user_codes, item_codes)),
+            shape=(len(self.user_ids), len(self.item_ids))
         )
+        self.user_item_matrix.eliminate_zeros()
+        self._user_positions = {user: row for row, user in enumerate(self.user_ids)}
         
         self.logger.info(f"Created user-item matrix: {self.user_item_matrix.shape[0]} users × {self.user_item_matrix.shape[1]} items")
     
@@ -118,6 +144,64 @@ class CollaborativeFilteringRecommender:
         
         self.logger.info(f"Created similarity mappings for {len(self.product_similarities)} products")
     
+    @staticmethod
+    def _group_codes(keys: np.ndarray, values: np.ndarray, n_keys: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Group values by integer key as (offsets, values); key k owns values[offsets[k]:offsets[k + 1]]"""
+        offsets = np.zeros(n_keys + 1, dtype=np.int64)
+        np.cumsum(np.bincount(keys, minlength=n_keys), out=offsets[1:])
+        # A stable sort keeps each key's values in review order
+        return offsets, values[np.argsort(keys, kind='stable')]
+    
+    def _create_purchase_index(self):
+        """Build customer -> products and product -> customers indexes over the category codes"""
+        customers = self.reviews_df['customer_id'].astype('category')
+        products = self.reviews_df['product_asin'].astype('category')
+        self.customer_categories = customers.cat.categories
+        self.product_categories = products.cat.categories
+        
+        customer_codes = customers.cat.codes.to_numpy()
+        product_codes = products.cat.codes.to_numpy()
+        valid = (customer_codes >= 0) & (product_codes >= 0)
+        customer_codes = customer_codes[valid].astype(np.int64)
+        product_codes = product_codes[valid].astype(np.int64)
+        
+        self._customer_offsets, self._customer_products = self._group_codes(
+            customer_codes, product_codes, len(self.customer_categories))
+        self._product_offsets, self._product_customers = self._group_codes(
+            product_codes, customer_codes, len(self.product_categories))
+    
+    def customer_co_purchases(self, customer_id: str) -> Dict[str, Any]:
+        """
+        Count the other customers who reviewed the same products as a customer
+        
+        Args:
+            customer_id: Customer ID to analyze
+            
+        Returns:
+            Dictionary with 'products' (the customer's product ASINs in review
+            order), 'co_buyers' (number of other customers per product) and
+            'shared_products' (Series of products shared with the customer,
+            indexed by other customer ID)
+        """
+        customer_code = self.customer_categories.get_indexer([customer_id])[0]
+        if customer_code < 0:
+            return {'products': np.empty(0, dtype=object), 'co_buyers': np.empty(0, dtype=np.int64),
+                    'shared_products': pd.Series(dtype=np.int64)}
+        
+        start, end = self._customer_offsets[customer_code], self._customer_offsets[customer_code + 1]
+        products = pd.unique(self._customer_products[start:end])
+        
+        # Other customers per product, and products shared with each other customer
+        co_buyers, shared = co_purchase_counts(self._product_offsets, self._product_customers, products,
+                                               customer_code, len(self.customer_categories))
+        co_customers = np.flatnonzero(shared)
+        
+        return {
+            'products': np.asarray(self.product_categories[products], dtype=object),
+            'co_buyers': co_buyers,
+            'shared_products': pd.Series(shared[co_customers], index=self.customer_categories[co_customers])
+        }
+    
     @timing_decorator
     def recommend_for_user(self, customer_id: str, n_recommendations: int = 10) -> List[Dict[str, Any]]:
         """
@@ -130,12 +214,11 @@ class CollaborativeFilteringRecommender:
         Returns:
             List of recommended products with scores
         """
-        if customer_id not in self.user_item_matrix.index:
+        if customer_id not in self._user_positions:
             return self._cold_start_recommendations(n_recommendations)
         
-        # Get user's ratings
-        user_ratings = self.user_item_matrix.loc[customer_id]
-        user_rated_items = user_ratings[user_ratings > 0].index.tolist()
+        # Get the column positions of the user's rated items
+        user_rated_items = self._user_row(customer_id)[0]
         
         # Find similar users
         similar_users = self._find_similar_users(customer_id, n_users=20)
@@ -147,67 +230,70 @@ class CollaborativeFilteringRecommender:
         
         return recommendations
     
-    def _find_similar_users(self, customer_id: str, n_users: int = 20) -> List[Tuple[str, float]]:
-        """Find users similar to the given customer"""
-        user_ratings = self.user_item_matrix.loc[customer_id]
-        similarities = []
-        
-        for other_user in self.user_item_matrix.index:
-            if other_user != customer_id:
-                other_ratings = self.user_item_matrix.loc[other_user]
-                similarity = self._calculate_user_similarity(user_ratings, other_ratings)
-                if similarity > 0:
-                    similarities.append((other_user, similarity))
-        
-        # Sort by similarity and return top n
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:n_users]
+    def _user_row(self, customer_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Column positions and ratings of a user's rated items"""
+        matrix = self.user_item_matrix
+        row = self._user_positions[customer_id]
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        return matrix.indices[start:end], matrix.data[start:end]
     
-    def _calculate_user_similarity(self, user1_ratings: pd.Series, user2_ratings: pd.Series) -> float:
-        """Calculate cosine similarity between two users"""
-        # Find common items
-        common_items = (user1_ratings > 0) & (user2_ratings > 0)
-        
-        if common_items.sum() < 2:  # Need at least 2 common items
-            return 0.0
+    def _find_similar_users(self, customer_id: str, n_users: int = 20) -> List[Tuple[str, float]]:
+        """
+        Find users similar to the given customer
         
-        # Calculate cosine similarity
-        user1_common = user1_ratings[common_items]
-        user2_common = user2_ratings[common_items]
+        Cosine similarity is computed over the items both users rated, for all
+        users at once. Users need at least 2 common items to be considered similar.
+        """
+        row = self._user_positions[customer_id]
+        common_counts, similarities = user_similarities(self.user_item_matrix, row)
         
-        dot_product = np.dot(user1_common, user2_common)
-        norm1 = np.linalg.norm(user1_common)
-        norm2 = np.linalg.norm(user2_common)
+        valid = (common_counts >= 2) & (similarities > 0)
+        valid[row] = False
+        candidates = np.flatnonzero(valid)
         
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+        # Sort by similarity (ties keep matrix order) and return top n
+        top = candidates[np.argsort(-similarities[candidates], kind='stable')][:n_users]
+        return [(self.user_ids[other], float(similarities[other])) for other in top]
+    
+    def _score_neighbours(self, similar_users: List[Tuple[str, float]]):
+        """Weighted average neighbour rating per item, and the first neighbour that rated it"""
+        rows = [self._user_positions[user] for user, _ in similar_users]
+        weights = [similarity for _, similarity in similar_users]
+        item_scores, item_weights, first_seen = accumulate_neighbours(self.user_item_matrix, rows, weights)
+        
+        scores = np.zeros(len(self.item_ids))
+        np.divide(item_scores, item_weights, out=scores, where=item_weights > 0)
+        return scores, first_seen
+    
+    def score_user(self, user_row: int, n_neighbours: int = 20) -> np.ndarray:
+        """
+        Predict a score for every item from the user's most similar users
         
-        return dot_product / (norm1 * norm2)
+        Args:
+            user_row: Row of the user in user_item_matrix (see user_ids)
+            n_neighbours: Number of similar users to aggregate
+            
+        Returns:
+            Array aligned to item_ids with the similarity-weighted average
+            rating of the neighbours (0 for items no neighbour rated)
+        """
+        similar_users = self._find_similar_users(self.user_ids[user_row], n_users=n_neighbours)
+        return self._score_neighbours(similar_users)[0]
     
     def _generate_user_based_recommendations(self, customer_id: str, similar_users: List[Tuple[str, float]], 
-                                           user_rated_items: List[str], n_recommendations: int) -> List[Dict[str, Any]]:
+                                           user_rated_items: np.ndarray, n_recommendations: int) -> List[Dict[str, Any]]:
         """Generate recommendations based on similar users' preferences"""
-        item_scores = defaultdict(float)
-        item_weights = defaultdict(float)
+        item_scores, first_seen = self._score_neighbours(similar_users)
         
-        for similar_user, similarity in similar_users:
-            similar_user_ratings = self.user_item_matrix.loc[similar_user]
-            
-            for item, rating in similar_user_ratings.items():
-                if rating > 0 and item not in user_rated_items:
-                    item_scores[item] += similarity * rating
-                    item_weights[item] += similarity
-        
-        # Calculate weighted average scores
-        recommendations = []
-        for item in item_scores:
-            if item_weights[item] > 0:
-                score = item_scores[item] / item_weights[item]
-                recommendations.append((item, score))
+        # Candidates are items some similar user rated and the user has not
+        candidates = first_seen < len(similar_users)
+        candidates[user_rated_items] = False
+        candidates = np.flatnonzero(candidates)
+        scores = item_scores[candidates]
         
-        # Sort by score and get top n
-        recommendations.sort(key=lambda x: x[1], reverse=True)
-        top_recommendations = recommendations[:n_recommendations]
+        # Sort by score (ties in the order the items were first seen) and get top n
+        order = np.lexsort((candidates, first_seen[candidates], -scores))[:n_recommendations]
+        top_recommendations = [(self.item_ids[candidates[i]], scores[i]) for i in order]
         
         # Add product details
         result = []
@@ -312,7 +398,7 @@ class CollaborativeFilteringRecommender:
             List of trending products
         """
         # Calculate popularity score based on reviews and ratings
-        product_stats = self.reviews_df.groupby('product_asin').agg({
+        product_stats = self.reviews_df.groupby('product_asin', observed=True).agg({
             'rating': ['count', 'mean'],
             'helpful': 'sum'
         }).reset_index()
@@ -0,0 +1,209 @@
+"""
+User similarity and neighbour scoring kernels over the CSR user-item matrix,
+and co-purchase counting over the product -> customers review index
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+
+try:
+    from numba import njit
+except ImportError:  # optional JIT; the sparse NumPy implementation is used without it
+    njit = None
+
+
+def _user_similarities_numpy(indptr, indices, data, target):
+    """Common-item counts and cosine similarities via sparse products over the target's items"""
+    matrix = csr_matrix((data, indices, indptr), shape=(len(indptr) - 1, len(target)))
+    items = np.flatnonzero(target)
+    ratings = target[items]
+    common = matrix[:, items]
+
+    # Per user: number of common items, dot product, and squared norms over the common items
+    common_counts = np.diff(common.indptr)
+    dot_products = common @ ratings
+    norm1 = np.sqrt(csr_matrix((np.ones_like(common.data), common.indices, common.indptr),
+                               shape=common.shape) @ (ratings * ratings))
+    norm2 = np.sqrt(csr_matrix((common.data * common.data, common.indices, common.indptr),
+                               shape=common.shape) @ np.ones(len(items)))
+
+    denominator = norm1 * norm2
+    similarities = np.zeros(len(common_counts))
+    np.divide(dot_products, denominator, out=similarities, where=denominator > 0)
+    return common_counts, similarities
+
+
+def _user_similarities_loop(indptr, indices, data, target):
+    """Single pass over the CSR entries, accumulating per-user sums over items the target rated"""
+    n_users = len(indptr) - 1
+    common_counts = np.zeros(n_users, dtype=np.int64)
+    similarities = np.zeros(n_users, dtype=np.float64)
+
+    for user in range(n_users):
+        count = 0
+        dot_product = 0.0
+        squares1 = 0.0
+        squares2 = 0.0
+        for j in range(indptr[user], indptr[user + 1]):
+            rating = target[indices[j]]
+            if rating > 0:
+                count += 1
+                dot_product += rating * data[j]
+                squares1 += rating * rating
+                squares2 += data[j] * data[j]
+
+        common_counts[user] = count
+        denominator = np.sqrt(squares1) * np.sqrt(squares2)
+        if denominator > 0:
+            similarities[user] = dot_product / denominator
+
+    return common_counts, similarities
+
+
+def _accumulate_neighbours_numpy(indptr, indices, data, neighbour_rows, neighbour_similarities, n_items):
+    """Similarity-weighted rating sums, one vectorised scatter per neighbour"""
+    scores = np.zeros(n_items)
+    weights = np.zeros(n_items)
+    first_seen = np.full(n_items, len(neighbour_rows), dtype=np.int64)
+
+    for position in range(len(neighbour_rows)):
+        start, end = indptr[neighbour_rows[position]], indptr[neighbour_rows[position] + 1]
+        items = indices[start:end]
+        scores[items] += neighbour_similarities[position] * data[start:end]
+        weights[items] += neighbour_similarities[position]
+        np.minimum.at(first_seen, items, position)
+
+    return scores, weights, first_seen
+
+
+def _accumulate_neighbours_loop(indptr, indices, data, neighbour_rows, neighbour_similarities, n_items):
+    """Similarity-weighted rating sums, one scalar update per CSR entry"""
+    scores = np.zeros(n_items)
+    weights = np.zeros(n_items)
+    first_seen = np.full(n_items, len(neighbour_rows), dtype=np.int64)
+
+    for position in range(len(neighbour_rows)):
+        row = neighbour_rows[position]
+        similarity = neighbour_similarities[position]
+        for j in range(indptr[row], indptr[row + 1]):
+            item = indices[j]
+            scores[item] += similarity * data[j]
+            weights[item] += similarity
+            if first_seen[item] > position:
+                first_seen[item] = position
+
+    return scores, weights, first_seen
+
+
+def _co_purchase_counts_numpy(product_offsets, product_customers, products, customer, n_customers):
+    """Distinct (product, other customer) pairs via np.unique, then counted both ways"""
+    starts, ends = product_offsets[products], product_offsets[products + 1]
+    positions = np.repeat(np.arange(len(products)), ends - starts)
+    buyers = np.concatenate([product_customers[s:e] for s, e in zip(starts, ends)])
+    others = buyers != customer
+    pairs = np.unique(positions[others] * n_customers + buyers[others])
+
+    co_buyers = np.bincount(pairs // n_customers, minlength=len(products))
+    shared = np.bincount(pairs % n_customers, minlength=n_customers)
+    return co_buyers, shared
+
+
+def _co_purchase_counts_loop(product_offsets, product_customers, products, customer, n_customers):
+    """Single scan over the products' customers, skipping repeat reviews of the same product"""
+    co_buyers = np.zeros(len(products), dtype=np.int64)
+    shared = np.zeros(n_customers, dtype=np.int64)
+    # Position of the last product each customer was counted for
+    last_counted = np.full(n_customers, -1, dtype=np.int64)
+
+    for position in range(len(products)):
+        product = products[position]
+        for j in range(product_offsets[product], product_offsets[product + 1]):
+            buyer = product_customers[j]
+            if buyer != customer and last_counted[buyer] != position:
+                last_counted[buyer] = position
+                co_buyers[position] += 1
+                shared[buyer] += 1
+
+    return co_buyers, shared
+
+
+if njit is not None:
+    _user_similarities_jit = njit(cache=True)(_user_similarities_loop)
+    _accumulate_neighbours_jit = njit(cache=True)(_accumulate_neighbours_loop)
+    _co_purchase_counts_jit = njit(cache=True)(_co_purchase_counts_loop)
+else:
+    _user_similarities_jit = None
+    _accumulate_neighbours_jit = None
+    _co_purchase_counts_jit = None
+
+
+def user_similarities(matrix: csr_matrix, row: int):
+    """
+    Cosine similarity of one user to every user, over the items both rated
+
+    Args:
+        matrix: CSR user-item ratings matrix
+        row: Row of the target user
+
+    Returns:
+        Tuple of (common item counts, similarities), one entry per user
+    """
+    target = np.zeros(matrix.shape[1])
+    start, end = matrix.indptr[row], matrix.indptr[row + 1]
+    target[matrix.indices[start:end]] = matrix.data[start:end]
+
+    if _user_similarities_jit is None:
+        return _user_similarities_numpy(matrix.indptr, matrix.indices, matrix.data, target)
+    return _user_similarities_jit(matrix.indptr, matrix.indices, matrix.data, target)
+
+
+def accumulate_neighbours(matrix: csr_matrix, neighbour_rows: np.ndarray, neighbour_similarities: np.ndarray):
+    """
+    Sum neighbours' ratings per item, weighted by their similarity
+
+    Args:
+        matrix: CSR user-item ratings matrix
+        neighbour_rows: Rows of the neighbouring users, most similar first
+        neighbour_similarities: Similarity of each neighbour
+
+    Returns:
+        Tuple of (weighted rating sums, similarity sums, position of the first
+        neighbour that rated each item), one entry per item
+    """
+    neighbour_rows = np.asarray(neighbour_rows, dtype=np.int64)
+    neighbour_similarities = np.asarray(neighbour_similarities, dtype=np.float64)
+
+    kernel = _accumulate_neighbours_jit if _accumulate_neighbours_jit is not None else _accumulate_neighbours_numpy
+    return kernel(matrix.indptr, matrix.indices, matrix.data, neighbour_rows, neighbour_similarities, matrix.shape[1])
+
+
+def co_purchase_counts(product_offsets: np.ndarray, product_customers: np.ndarray,
+                       products: np.ndarray, customer: int, n_customers: int):
+    """
+    Count the other customers of a customer's products, per product and per customer
+
+    Args:
+        product_offsets: Offsets into product_customers; product p owns
+            product_customers[product_offsets[p]:product_offsets[p + 1]]
+        product_customers: Customer codes grouped by product
+        products: Distinct product codes of the customer
+        customer: Code of the customer
+        n_customers: Total number of customer codes
+
+    Returns:
+        Tuple of (number of other customers per product, number of the
+        products shared with each customer code)
+    """
+    products = np.asarray(products, dtype=np.int64)
+    if _co_purchase_counts_jit is None:
+        return _co_purchase_counts_numpy(product_offsets, product_customers, products, customer, n_customers)
+    return _co_purchase_counts_jit(product_offsets, product_customers, products, customer, n_customers)
+
+
+def warm_up():
+    """Compile the JIT kernels ahead of the first request (no-op without numba)"""
+    if njit is None:
+        return
+    matrix = csr_matrix(np.array([[1.0, 2.0], [3.0, 0.0]]))
+    user_similarities(matrix, 0)
+    accumulate_neighbours(matrix, np.array([1]), np.array([1.0]))
+    co_purchase_counts(np.array([0, 2], dtype=np.int64), np.array([0, 1], dtype=np.int64), np.array([0]), 0, 2)
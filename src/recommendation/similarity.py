@@ -5,7 +5,7 @@ import numpy as np
 import pandas as pd
 from sklearn.metrics.pairwise import cosine_similarity, euclidean_distances
 from sklearn.feature_extraction.text import TfidfVectorizer
-from typing import Dict, List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Union
 import sys
 from pathlib import Path
 
@@ -44,19 +44,30 @@ class SimilarityCalculator:
         union[union == 0] = 1
         return intersection / union
     
-    def user_similarity(self, ratings_matrix: pd.DataFrame, method: str = "cosine") -> pd.DataFrame:
+    @staticmethod
+    def _to_array(ratings_matrix: Union[pd.DataFrame, np.ndarray]) -> Tuple[np.ndarray, pd.Index, pd.Index]:
+        """Split a ratings matrix into NaN-free values and its row/column labels"""
+        if isinstance(ratings_matrix, pd.DataFrame):
+            return ratings_matrix.fillna(0).values, ratings_matrix.index, ratings_matrix.columns
+        
+        # Plain arrays are used as-is (apart from NaN filling) and labelled by position
+        matrix = np.nan_to_num(np.asarray(ratings_matrix), nan=0.0)
+        return matrix, pd.RangeIndex(matrix.shape[0]), pd.RangeIndex(matrix.shape[1])
+    
+    def user_similarity(self, ratings_matrix: Union[pd.DataFrame, np.ndarray], method: str = "cosine") -> pd.DataFrame:
         """
         Calculate user-user similarity matrix
         
         Args:
-            ratings_matrix: User-item ratings matrix (users as rows, items as columns)
+            ratings_matrix: User-item ratings matrix (users as rows, items as columns),
+                either a DataFrame or a NumPy array
             method: Similarity method ('cosine', 'pearson', 'jaccard')
             
         Returns:
             DataFrame with user similarity scores
         """
         # Fill NaN values with 0 for similarity calculation
-        matrix = ratings_matrix.fillna(0).values
+        matrix, users, _ = self._to_array(ratings_matrix)
         
         if method == "cosine":
             similarity = self.cosine_similarity_matrix(matrix)
@@ -70,23 +81,25 @@ class SimilarityCalculator:
         # Convert back to DataFrame
         return pd.DataFrame(
             similarity, 
-            index=ratings_matrix.index, 
-            columns=ratings_matrix.index
+            index=users, 
+            columns=users
         )
     
-    def item_similarity(self, ratings_matrix: pd.DataFrame, method: str = "cosine") -> pd.DataFrame:
+    def item_similarity(self, ratings_matrix: Union[pd.DataFrame, np.ndarray], method: str = "cosine") -> pd.DataFrame:
         """
         Calculate item-item similarity matrix
         
         Args:
-            ratings_matrix: User-item ratings matrix (users as rows, items as columns)
+            ratings_matrix: User-item ratings matrix (users as rows, items as columns),
+                either a DataFrame or a NumPy array
             method: Similarity method ('cosine', 'pearson', 'jaccard')
             
         Returns:
             DataFrame with item similarity scores
         """
         # Transpose matrix to have items as rows
-        item_matrix = ratings_matrix.T.fillna(0).values
+        matrix, _, items = self._to_array(ratings_matrix)
+        item_matrix = matrix.T
         
         if method == "cosine":
             similarity = self.cosine_similarity_matrix(item_matrix)
@@ -100,8 +113,8 @@ class SimilarityCalculator:
         # Convert back to DataFrame
         return pd.DataFrame(
             similarity,
-            index=ratings_matrix.columns,
-            columns=ratings_matrix.columns
+            index=items,
+            columns=items
         )
     
     def content_similarity(self, products_df: pd.DataFrame, features: List[str] = None) -> pd.DataFrame:
@@ -118,11 +131,12 @@ class SimilarityCalculator:
         if features is None:
             features = ['category', 'brand', 'description']
         
-        # Combine text features
-        text_features = []
-        for _, row in products_df.iterrows():
-            combined_text = ' '.join([str(row[col]) for col in features if col in products_df.columns])
-            text_features.append(combined_text)
+        # Combine text features column-wise with str.cat; missing values become empty strings
+        columns = [products_df[col].astype('string').fillna('') for col in features if col in products_df.columns]
+        if columns:
+            text_features = columns[0].str.cat(columns[1:], sep=' ').tolist()
+        else:
+            text_features = [''] * len(products_df)
         
         # Calculate TF-IDF vectors
         vectorizer = TfidfVectorizer(max_features=1000, stop_words='english', lowercase=True)
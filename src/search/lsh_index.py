@@ -0,0 +1,95 @@
+"""
+MinHash locality-sensitive hashing index for fuzzy (token-set Jaccard) search
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class MinHashLSHIndex:
+    """
+    Banded MinHash LSH index over binary document-term rows
+
+    Each document's token set is summarised by n_permutations MinHash values,
+    split into n_bands bands. Documents sharing any band key with the query are
+    returned as candidates, so lookup cost does not grow with the corpus size.
+    Only the sorted band keys are kept; full signatures are discarded after fit.
+    """
+
+    PRIME = (1 << 31) - 1
+    MULTIPLIER = np.uint64(1000003)
+
+    def __init__(self, n_permutations: int = 64, n_bands: int = 16, seed: int = 42):
+        if n_permutations % n_bands != 0:
+            raise ValueError("n_permutations must be a multiple of n_bands")
+
+        self.n_bands = n_bands
+        self.rows_per_band = n_permutations // n_bands
+
+        rng = np.random.default_rng(seed)
+        self._hash_a = rng.integers(1, self.PRIME, n_permutations, dtype=np.int64)
+        self._hash_b = rng.integers(0, self.PRIME, n_permutations, dtype=np.int64)
+
+        self._band_keys = []
+        self._band_docs = []
+
+    def _band_key(self, token_ids: np.ndarray, segment_starts: np.ndarray, band: int) -> np.ndarray:
+        """Combine the MinHash values of one band into a single key per segment"""
+        key = np.zeros(len(segment_starts), dtype=np.uint64)
+        for perm in range(band * self.rows_per_band, (band + 1) * self.rows_per_band):
+            hashed = (self._hash_a[perm] * token_ids + self._hash_b[perm]) % self.PRIME
+            minhash = np.minimum.reduceat(hashed, segment_starts).astype(np.uint64)
+            key = key * self.MULTIPLIER + minhash
+        return key
+
+    def fit(self, doc_term_matrix: csr_matrix) -> "MinHashLSHIndex":
+        """
+        Build the band tables
+
+        Args:
+            doc_term_matrix: Sparse matrix with one row per document and a
+                non-zero entry for every token the document contains
+
+        Returns:
+            The fitted index
+        """
+        doc_term_matrix = doc_term_matrix.tocsr()
+        token_ids = doc_term_matrix.indices.astype(np.int64)
+        row_sizes = np.diff(doc_term_matrix.indptr)
+
+        # Documents without tokens cannot match anything and are left out
+        docs = np.flatnonzero(row_sizes > 0)
+        segment_starts = doc_term_matrix.indptr[:-1][docs]
+
+        self._band_keys = []
+        self._band_docs = []
+        for band in range(self.n_bands):
+            key = self._band_key(token_ids, segment_starts, band)
+            order = np.argsort(key, kind='stable')
+            self._band_keys.append(key[order])
+            self._band_docs.append(docs[order])
+
+        return self
+
+    def query(self, token_ids: np.ndarray) -> np.ndarray:
+        """
+        Find candidate documents for a query token set
+
+        Args:
+            token_ids: Vocabulary ids of the query tokens
+
+        Returns:
+            Sorted row positions of candidate documents
+        """
+        token_ids = np.unique(np.asarray(token_ids, dtype=np.int64))
+        if len(token_ids) == 0 or not self._band_keys:
+            return np.empty(0, dtype=np.intp)
+
+        segment_starts = np.zeros(1, dtype=np.intp)
+        candidates = []
+        for band in range(self.n_bands):
+            key = self._band_key(token_ids, segment_starts, band)[0]
+            start = np.searchsorted(self._band_keys[band], key, side='left')
+            end = np.searchsorted(self._band_keys[band], key, side='right')
+            candidates.append(self._band_docs[band][start:end])
+
+        return np.unique(np.concatenate(candidates)).astype(np.intp)
@@ -2,10 +2,18 @@
 Query processor for parsing and validating search queries
 """
 import re
+import sys
+import functools
+from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
+# Add src to path to import our modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config import SEARCH_CONFIG
+
 
 class ComparisonOperator(Enum):
     """Enumeration of supported comparison operators"""
@@ -80,7 +88,18 @@ class QueryProcessor:
         - "books category = Books AND rating >= 4.0"
         - "electronics price between 100 and 500"
         """
-        query = SearchQuery()
+        # Parsing is pure, so the parts of repeated strings come from a shared cache;
+        # SearchQuery is mutable, so a fresh one is built from them on every call
+        text_query, filters = _parse_query_parts(query_string)
+        return SearchQuery(
+            text_query=text_query,
+            filters=[SearchFilter(field, operator, value) for field, operator, value in filters]
+        )
+    
+    def _parse_parts(self, query_string: str) -> Tuple[Optional[str], Tuple[Tuple[str, ComparisonOperator, Any], ...]]:
+        """Parse a query string into its text and (field, operator, value) filters"""
+        text_query = None
+        filters = []
         
         # Split the query into parts
         parts = self._split_query_parts(query_string)
@@ -92,15 +111,15 @@ class QueryProcessor:
             if re.search(self.operators_pattern, part):
                 filter_obj = self._parse_filter(part)
                 if filter_obj:
-                    query.filters.append(filter_obj)
+                    filters.append((filter_obj.field, filter_obj.operator, filter_obj.value))
             else:
                 # Treat as text search
-                if query.text_query:
-                    query.text_query += f" {part}"
+                if text_query:
+                    text_query += f" {part}"
                 else:
-                    query.text_query = part
+                    text_query = part
         
-        return query
+        return text_query, tuple(filters)
     
     def _split_query_parts(self, query_string: str) -> List[str]:
         """Split query string into logical parts"""
@@ -223,4 +242,10 @@ class QueryProcessor:
             "brand = Apple AND price > 100",
             "rating >= 4.5 AND num_reviews > 100",
             "Sports equipment under $100"
-        ]
\ No newline at end of file
+        ]
+
+
+@functools.lru_cache(maxsize=SEARCH_CONFIG['parsed_query_cache_size'])
+def _parse_query_parts(query_string: str) -> Tuple[Optional[str], Tuple[Tuple[str, ComparisonOperator, Any], ...]]:
+    """Text and filters of a query string as immutable tuples, memoized per string"""
+    return QueryProcessor()._parse_parts(query_string)
@@ -0,0 +1,126 @@
+"""
+Relevance scoring and top-k selection for product search results
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # optional JIT; the NumPy implementation is used without it
+    njit = None
+
+# Rank assumed for products without a valid salesrank
+DEFAULT_SALESRANK = 1000000.0
+
+
+def top_k_desc(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k largest scores, sorted descending, without a full sort"""
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind='stable')]
+    return np.argsort(-scores, kind='stable')
+
+
+def _relevance_top_k_numpy(avg_rating, total_reviews, salesrank, salesrank_valid, rows, k):
+    """Vectorised relevance scores followed by a partial top-k selection"""
+    rank = np.where(salesrank_valid[rows], salesrank[rows], DEFAULT_SALESRANK)
+    scores = (
+        avg_rating[rows] * 0.4 +
+        np.log1p(total_reviews[rows]) * 0.3 +
+        (1.0 / (1.0 + rank)) * 1000 * 0.3
+    )
+    top = top_k_desc(scores, k)
+    return top, scores[top]
+
+
+def _relevance_heap(avg_rating, total_reviews, salesrank, salesrank_valid, rows, k):
+    """
+    Score each row inline and keep the k best in a min-heap, in a single pass
+
+    The heap root is the weakest kept entry: lowest score, and among equal
+    scores the latest position, so ties resolve like a stable descending sort.
+    """
+    k = min(k, len(rows))
+    heap_scores = np.empty(k, dtype=np.float64)
+    heap_pos = np.empty(k, dtype=np.int64)
+    size = 0
+
+    for i in range(len(rows)):
+        row = rows[i]
+        rank = salesrank[row] if salesrank_valid[row] else DEFAULT_SALESRANK
+        score = (
+            avg_rating[row] * 0.4 +
+            np.log1p(total_reviews[row]) * 0.3 +
+            (1.0 / (1.0 + rank)) * 1000 * 0.3
+        )
+
+        if size < k:
+            # Sift the new entry up from the end of the heap
+            j = size
+            size += 1
+            while j > 0:
+                parent = (j - 1) // 2
+                if heap_scores[parent] < score or (heap_scores[parent] == score and heap_pos[parent] > i):
+                    break
+                heap_scores[j] = heap_scores[parent]
+                heap_pos[j] = heap_pos[parent]
+                j = parent
+            heap_scores[j] = score
+            heap_pos[j] = i
+        elif score > heap_scores[0]:
+            # Replace the root and sift it down
+            j = 0
+            while True:
+                child = 2 * j + 1
+                if child >= size:
+                    break
+                right = child + 1
+                if right < size and (heap_scores[right] < heap_scores[child] or
+                                     (heap_scores[right] == heap_scores[child] and heap_pos[right] > heap_pos[child])):
+                    child = right
+                if score < heap_scores[child] or (score == heap_scores[child] and i > heap_pos[child]):
+                    break
+                heap_scores[j] = heap_scores[child]
+                heap_pos[j] = heap_pos[child]
+                j = child
+            heap_scores[j] = score
+            heap_pos[j] = i
+
+    return heap_pos[:size], heap_scores[:size]
+
+
+if njit is not None:
+    _relevance_heap_jit = njit(cache=True)(_relevance_heap)
+else:
+    _relevance_heap_jit = None
+
+
+def relevance_top_k(avg_rating: np.ndarray, total_reviews: np.ndarray, salesrank: np.ndarray,
+                    salesrank_valid: np.ndarray, rows: np.ndarray, k: int):
+    """
+    Rank rows by relevance (rating, review count and salesrank) and keep the best k
+
+    With numba installed the score and top-k selection are fused into one
+    compiled pass, so no per-row score array is allocated.
+
+    Args:
+        avg_rating: Average rating of every product
+        total_reviews: Review count of every product
+        salesrank: Salesrank of every product
+        salesrank_valid: Whether each product has a valid salesrank
+        rows: Row positions to rank
+        k: Maximum number of results
+
+    Returns:
+        Tuple of (positions into rows, relevance scores), best first
+    """
+    if k <= 0 or len(rows) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+    if _relevance_heap_jit is None:
+        return _relevance_top_k_numpy(avg_rating, total_reviews, salesrank, salesrank_valid, rows, k)
+
+    positions, scores = _relevance_heap_jit(avg_rating, total_reviews, salesrank, salesrank_valid,
+                                            np.asarray(rows, dtype=np.int64), k)
+    order = np.lexsort((positions, -scores))
+    return positions[order].astype(np.intp), scores[order]
@@ -4,21 +4,74 @@ Supports complex queries with mathematical operators as required by the course p
 """
 import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import re
 import sys
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Union
-from difflib import SequenceMatcher
+from sklearn.feature_extraction.text import CountVectorizer
 import operator
+import functools
+
+try:
+    import hyperscan
+except ImportError:  # optional SIMD matcher; the Arrow regex kernel is used without it
+    hyperscan = None
+
+try:
+    import numexpr
+except ImportError:  # optional fused evaluator; filters are combined with NumPy without it
+    numexpr = None
 
 # Add src to path to import our modules
 sys.path.append(str(Path(__file__).parent.parent))
 
-from utils.helpers import setup_logging, timing_decorator
-from utils.config import PROCESSED_DATA_DIR, SEARCH_CONFIG
+from utils.helpers import setup_logging, timing_decorator, load_processed_table
+from utils.config import SEARCH_CONFIG
+from search.lsh_index import MinHashLSHIndex
+from search.scoring import relevance_top_k, top_k_desc
 
 logger = setup_logging()
 
+# Characters that give a text query regex meaning; queries without them are plain substrings
+REGEX_METACHARACTERS = frozenset('.^$*+?{}[]\\|()')
+
+# Unescaped \A, \z or \Z: anchors to the whole text, which a scan of all rows joined cannot honour
+WHOLE_TEXT_ANCHOR = re.compile(r'(?<!\\)(?:\\\\)*\\[AzZ]')
+
+# Comparison operators as written in a generated filter expression
+COMPARISON_OPERATORS = {'>': '>', '>=': '>=', '=': '==', '==': '==', '<': '<', '<=': '<=', '!=': '!='}
+
+
+def char_trigrams(text: str) -> List[str]:
+    """Split text into overlapping three-character windows"""
+    return [text[i:i + 3] for i in range(len(text) - 2)]
+
+
+@functools.lru_cache(maxsize=None)
+def compile_numeric_filter(operators: Tuple[str, ...]) -> Tuple[str, Any]:
+    """
+    Generate the filter expression for one combination of comparison operators
+    
+    The expression ANDs a row mask with one comparison per operator, reading
+    column xN and threshold vN. It is also compiled into a plain Python function
+    once per shape, so repeated queries skip the per-filter operator dispatch.
+    
+    Args:
+        operators: Comparison operators, in filter order
+        
+    Returns:
+        Tuple of (expression source, compiled function taking mask, x0, v0, ...)
+    """
+    terms = ['mask'] + [f'(x{i} {COMPARISON_OPERATORS[op]} v{i})' for i, op in enumerate(operators)]
+    expression = ' & '.join(terms)
+    params = ', '.join(['mask'] + [f'x{i}, v{i}' for i in range(len(operators))])
+    
+    namespace = {}
+    exec(compile(f"def numeric_filter({params}):\n    return {expression}\n", '<numeric_filter>', 'exec'), namespace)
+    return expression, namespace['numeric_filter']
+
 
 class SearchOperator:
     """Mathematical and comparison operators for search queries"""
@@ -57,13 +110,15 @@ class AmazonSearchEngine:
         
     @timing_decorator
     def load_data(self):
-        """Load processed CSV data"""
+        """Load processed data, reading only the columns the search engine uses"""
         try:
             # Load all processed data files
-            self.products_df = pd.read_csv(PROCESSED_DATA_DIR / "amazon_products.csv")
-            self.reviews_df = pd.read_csv(PROCESSED_DATA_DIR / "amazon_reviews.csv")
-            self.categories_df = pd.read_csv(PROCESSED_DATA_DIR / "amazon_categories.csv")
-            self.similar_products_df = pd.read_csv(PROCESSED_DATA_DIR / "amazon_similar_products.csv")
+            self.products_df = load_processed_table("amazon_products", columns=[
+                'id', 'asin', 'title', 'group', 'salesrank', 'total_reviews', 'avg_rating'
+            ])
+            self.reviews_df = load_processed_table("amazon_reviews", categorical=['customer_id', 'product_asin'])
+            self.categories_df = load_processed_table("amazon_categories", columns=['product_id', 'category_path'])
+            self.similar_products_df = load_processed_table("amazon_similar_products", columns=['product_asin', 'similar_asin'])
             
             self.logger.info(f"Loaded {len(self.products_df):,} products")
             self.logger.info(f"Loaded {len(self.reviews_df):,} reviews")
@@ -92,23 +147,300 @@ class AmazonSearchEngine:
                 how='left'
             )
             
-            # Create search text for full-text search
+            # Create search text for full-text search (joined and lowercased in Arrow kernels)
+            title = pa.array(self.products_df['title'].fillna(''), type=pa.string())
+            # group may already arrive dictionary-encoded (categorical) from Parquet
+            group = pc.fill_null(pa.array(self.products_df['group'], from_pandas=True).cast(pa.string()), '')
+            main_category = pa.array(self.products_df['main_category'].fillna(''), type=pa.string())
+            joined = pc.binary_join_element_wise(title, group, main_category, ' ')
+            self._search_text_arrow = pc.utf8_lower(joined)
             self.products_df['search_text'] = (
-                self.products_df['title'].fillna('') + ' ' +
-                self.products_df['group'].fillna('') + ' ' +
-                self.products_df['main_category'].fillna('')
-            ).str.lower()
+                self._search_text_arrow.to_pandas(types_mapper=pd.ArrowDtype).set_axis(self.products_df.index)
+            )
             
             # Handle missing values
             self.products_df['avg_rating'] = self.products_df['avg_rating'].fillna(0)
             self.products_df['total_reviews'] = self.products_df['total_reviews'].fillna(0)
-            self.products_df['salesrank'] = self.products_df['salesrank'].fillna(float('inf'))
+            
+            # Missing/invalid sales ranks are exposed as NaN, with a parallel validity flag
+            salesrank = self.products_df['salesrank'].to_numpy(dtype=np.float64, na_value=np.nan)
+            salesrank_valid = np.isfinite(salesrank) & (salesrank > 0)
+            self.products_df['salesrank'] = np.where(salesrank_valid, salesrank, np.nan)
+            self.products_df['salesrank_valid'] = salesrank_valid
+            
+            # Dictionary-encode the low-cardinality text columns; filters compare integer codes
+            self.products_df['group'] = self.products_df['group'].astype('category')
+            self.products_df['main_category'] = self.products_df['main_category'].astype('category')
+            
+            # Contiguous numeric arrays for the shared filter kernel and mask-based searches.
+            # Review counts and sales ranks are whole numbers and fit in int32, halving the
+            # bytes each filter and top-k pass reads; ratings stay float64 so decimal
+            # thresholds compare exactly.
+            self._avg_rating = self.products_df['avg_rating'].to_numpy(dtype=np.float64)
+            self._total_reviews = self.products_df['total_reviews'].to_numpy(dtype=np.int32)
+            # Invalid ranks are 0 here; readers check _salesrank_valid
+            self._salesrank = np.where(salesrank_valid, salesrank, 0).astype(np.int32)
+            self._salesrank_valid = self.products_df['salesrank_valid'].to_numpy(dtype=bool)
+            
+            # Row positions per key so product lookups avoid full-table scans
+            self._review_idx_by_asin = self.reviews_df.groupby('product_asin', observed=True).indices
+            self._categories_idx_by_pid = self.categories_df.groupby('product_id').indices
+            self._similar_idx_by_asin = self.similar_products_df.groupby('product_asin').indices
+            
+            # Integer customer codes per review row, for set operations on reviewers
+            self._review_customer_codes = pd.factorize(self.reviews_df['customer_id'], use_na_sentinel=False)[0]
+            
+            # Binary document-term matrix for token-set (Jaccard) text relevance
+            self._text_vectorizer = CountVectorizer(binary=True, lowercase=False, token_pattern=r"(?u)\b\w+\b")
+            self._text_doc_matrix = self._text_vectorizer.fit_transform(self._search_text_arrow.to_pylist()).tocsr()
+            self._text_doc_sizes = np.asarray(self._text_doc_matrix.sum(axis=1)).ravel()
+            self._fuzzy_index = None
+            
+            # Trigram inverted index: column j of the CSC matrix lists the rows containing trigram j
+            self._trigram_vectorizer = CountVectorizer(binary=True, analyzer=char_trigrams)
+            self._trigram_postings = self._trigram_vectorizer.fit_transform(self._search_text_arrow.to_pylist()).tocsc()
+            
+            # Category statistics are computed on first use
+            self._category_stats = None
+            
+            # Scan buffer for the hyperscan matcher is built lazily on the first text query
+            self._text_scan_buffer = None
+            self._text_row_starts = None
+            self._hyperscan_db_cache = {}
             
             self.logger.info("Search indices prepared successfully")
             
         except Exception as e:
             self.logger.error(f"Error preparing search indices: {str(e)}")
     
+    def _build_text_scan_buffer(self):
+        """Concatenate search_text rows into one newline-separated buffer with row offsets"""
+        encoded = [text.encode('utf-8') for text in self._search_text_arrow.to_pylist()]
+        row_lengths = np.fromiter((len(text) + 1 for text in encoded), dtype=np.int64, count=len(encoded))
+        self._text_row_starts = np.concatenate(([0], np.cumsum(row_lengths)[:-1]))
+        self._text_scan_buffer = b'\n'.join(encoded)
+    
+    def _hyperscan_match(self, text: str) -> np.ndarray:
+        """
+        Scan the whole search_text buffer once with hyperscan, then verify the hit rows
+        
+        The rows are joined with newlines and the pattern is compiled multiline, so ^ and $
+        also match at row boundaries. Every match inside a row is then reported, but matches
+        that run across a boundary (e.g. through \\s or [^x]) can add rows that do not match
+        on their own, so the hit rows are re-checked with the Arrow regex kernel.
+        """
+        if self._text_scan_buffer is None:
+            self._build_text_scan_buffer()
+        
+        db = self._hyperscan_db_cache.get(text)
+        if db is None:
+            db = hyperscan.Database(mode=hyperscan.HS_MODE_BLOCK)
+            db.compile(expressions=[text.encode('utf-8')], ids=[0], elements=1,
+                       flags=[hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_MULTILINE])
+            
+            # Keep the cache bounded by dropping the oldest compiled pattern
+            if len(self._hyperscan_db_cache) >= SEARCH_CONFIG['compiled_pattern_cache_size']:
+                self._hyperscan_db_cache.pop(next(iter(self._hyperscan_db_cache)))
+            self._hyperscan_db_cache[text] = db
+        
+        match_ends = []
+        
+        def on_match(pattern_id, start, end, flags, context):
+            match_ends.append(end)
+        
+        db.scan(self._text_scan_buffer, match_event_handler=on_match)
+        
+        mask = np.zeros(len(self._text_row_starts), dtype=bool)
+        if match_ends:
+            rows = np.searchsorted(self._text_row_starts, np.asarray(match_ends) - 1, side='right') - 1
+            candidates = np.unique(rows)
+            mask[candidates] = pc.match_substring_regex(
+                self._search_text_arrow.take(candidates), text
+            ).to_numpy(zero_copy_only=False)
+        return mask
+    
+    def _trigram_match(self, text: str) -> np.ndarray:
+        """Intersect trigram posting lists, then verify the substring on the candidate rows only"""
+        vocabulary = self._trigram_vectorizer.vocabulary_
+        mask = np.zeros(self._trigram_postings.shape[0], dtype=bool)
+        
+        postings = []
+        for trigram in set(char_trigrams(text)):
+            column = vocabulary.get(trigram)
+            if column is None:
+                return mask
+            start, end = self._trigram_postings.indptr[column], self._trigram_postings.indptr[column + 1]
+            postings.append(self._trigram_postings.indices[start:end])
+        
+        # Intersect starting from the shortest posting list
+        postings.sort(key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        
+        if len(candidates) > 0:
+            verified = pc.match_substring(self._search_text_arrow.take(candidates), text)
+            mask[candidates[verified.to_numpy(zero_copy_only=False)]] = True
+        return mask
+    
+    def _match_search_text(self, text: str) -> np.ndarray:
+        """
+        Find products whose search_text matches the given (lowercased) text
+        
+        Args:
+            text: Lowercased search text
+            
+        Returns:
+            Boolean mask aligned with the rows of products_df
+        """
+        # Plain substrings skip regex compilation: long ones use the trigram index,
+        # short ones a literal substring kernel
+        if REGEX_METACHARACTERS.isdisjoint(text):
+            if len(text) >= 3:
+                return self._trigram_match(text)
+            return pc.match_substring(self._search_text_arrow, text).to_numpy(zero_copy_only=False)
+        
+        if hyperscan is not None and not WHOLE_TEXT_ANCHOR.search(text):
+            try:
+                return self._hyperscan_match(text)
+            except hyperscan.error as e:
+                # Patterns hyperscan cannot compile fall back to the Arrow regex kernel
+                self.logger.debug(f"Hyperscan fallback for '{text}': {str(e)}")
+        
+        # Run the regex kernel on the precomputed lowercased Arrow array directly
+        return pc.match_substring_regex(self._search_text_arrow, text).to_numpy(zero_copy_only=False)
+    
+    def _filter_search_text(self, mask: np.ndarray, text: str) -> np.ndarray:
+        """
+        AND a text match into a row mask built by the cheaper filters
+        
+        Index-backed literal matches are always taken over the whole table. Scanning
+        matches are restricted to the surviving rows when those are a small fraction.
+        
+        Args:
+            mask: Current row mask
+            text: Lowercased search text
+            
+        Returns:
+            Row mask with the text filter applied
+        """
+        is_literal = REGEX_METACHARACTERS.isdisjoint(text)
+        rows = np.flatnonzero(mask)
+        if (is_literal and len(text) >= 3) or len(rows) * SEARCH_CONFIG['text_scan_selectivity'] >= len(mask):
+            return mask & self._match_search_text(text)
+        
+        kernel = pc.match_substring if is_literal else pc.match_substring_regex
+        mask[rows] = kernel(self._search_text_arrow.take(rows), text).to_numpy(zero_copy_only=False)
+        return mask
+    
+    @staticmethod
+    def _category_isin(df: pd.DataFrame, column: str, values: List[str]) -> np.ndarray:
+        """Case-insensitive IN filter on a categorical column, evaluated as a code-set membership test"""
+        categories = df[column].cat.categories
+        codes = np.flatnonzero(categories.str.lower().isin([str(v).lower() for v in values]))
+        return np.isin(df[column].cat.codes.to_numpy(), codes)
+    
+    @staticmethod
+    def _category_equals(df: pd.DataFrame, column: str, value: str) -> np.ndarray:
+        """Case-insensitive equality filter on a categorical column, evaluated on its codes"""
+        return AmazonSearchEngine._category_isin(df, column, [value])
+    
+    @staticmethod
+    def _category_contains(df: pd.DataFrame, column: str, pattern: str) -> np.ndarray:
+        """Case-insensitive pattern filter on a categorical column, matched once per category"""
+        categories = df[column].cat.categories
+        is_regex = not REGEX_METACHARACTERS.isdisjoint(pattern)
+        codes = np.flatnonzero(categories.str.contains(pattern, case=False, na=False, regex=is_regex))
+        return np.isin(df[column].cat.codes.to_numpy(), codes)
+    
+    _top_k_desc = staticmethod(top_k_desc)
+    
+    def _fuzzy_match(self, text: str) -> np.ndarray:
+        """
+        Find products whose token set is similar to the query's
+        
+        Candidates come from a MinHash LSH index (built on first use) and are
+        kept when their Jaccard similarity reaches the configured threshold.
+        
+        Args:
+            text: Lowercased search text
+            
+        Returns:
+            Row positions of matching products
+        """
+        if self._fuzzy_index is None:
+            self._fuzzy_index = MinHashLSHIndex().fit(self._text_doc_matrix)
+        
+        query_tokens = self._text_vectorizer.transform([text]).indices
+        candidates = self._fuzzy_index.query(query_tokens)
+        similarity = self._token_jaccard(text, candidates)
+        return candidates[similarity >= SEARCH_CONFIG['similarity_threshold']]
+    
+    def _numeric_top_k(self, values: np.ndarray, operator_str: str, threshold: float, limit: int) -> np.ndarray:
+        """
+        Filter a numeric column with a comparison operator and keep the largest matches
+        
+        Args:
+            values: Column values aligned with the rows of products_df
+            operator_str: Comparison operator (>, >=, =, <, <=, !=)
+            threshold: Value to compare against
+            limit: Maximum number of rows to return
+            
+        Returns:
+            Row positions of the matches, sorted by value descending
+        """
+        if operator_str not in SearchOperator.OPERATORS:
+            raise ValueError(f"Unsupported operator: {operator_str}")
+        
+        matches = np.flatnonzero(SearchOperator.OPERATORS[operator_str](values, threshold))
+        return matches[self._top_k_desc(values[matches], limit)]
+    
+    def _apply_numeric_filters(self, mask: np.ndarray, comparisons: List[Tuple[np.ndarray, str, float]]) -> np.ndarray:
+        """
+        AND a set of numeric comparisons into a row mask
+        
+        Comparisons go through an expression generated once per operator shape.
+        With numexpr installed it is evaluated as a single multithreaded pass, so
+        no intermediate boolean array is created per filter; otherwise the
+        compiled Python function is called. Unknown operators are ignored.
+        
+        Args:
+            mask: Current row mask
+            comparisons: (values, operator, threshold) tuples
+            
+        Returns:
+            Row mask with the comparisons applied
+        """
+        comparisons = [c for c in comparisons if c[1] in SearchOperator.OPERATORS]
+        if not comparisons:
+            return mask
+        
+        operators = tuple(op_str for _, op_str, _ in comparisons)
+        if all(op_str in COMPARISON_OPERATORS for op_str in operators):
+            expression, numeric_filter = compile_numeric_filter(operators)
+            local_dict = {'mask': mask}
+            for i, (values, _, value) in enumerate(comparisons):
+                local_dict[f'x{i}'] = values
+                local_dict[f'v{i}'] = value
+            if numexpr is not None:
+                return numexpr.evaluate(expression, local_dict=local_dict)
+            return numeric_filter(**local_dict)
+        
+        for values, op_str, value in comparisons:
+            mask &= SearchOperator.OPERATORS[op_str](values, value)
+        return mask
+    
+    def _token_jaccard(self, text: str, rows: np.ndarray) -> np.ndarray:
+        """Jaccard similarity between the query's token set and each given product's token set"""
+        query_size = len(set(self._text_vectorizer.build_analyzer()(text)))
+        query_vector = self._text_vectorizer.transform([text])
+        
+        intersection = (self._text_doc_matrix[rows] @ query_vector.T).toarray().ravel()
+        union = self._text_doc_sizes[rows] + query_size - intersection
+        return np.divide(intersection, union, out=np.zeros(len(rows)), where=union > 0)
+    
     def search_best_sellers(self, category: str = None, n: int = 10) -> pd.DataFrame:
         """
         Find best n sellers of a certain category
@@ -120,30 +452,29 @@ class AmazonSearchEngine:
         Returns:
             DataFrame with top selling products
         """
-        df = self.products_df.copy()
+        products = self.products_df
+        
+        # Exclude products without valid sales rank
+        mask = self._salesrank_valid.copy()
         
         # Filter by category if specified
         if category:
             if category.lower() in ['book', 'books']:
-                df = df[df['group'].str.lower() == 'book']
+                mask &= self._category_equals(products, 'group', 'book')
             elif category.lower() in ['music', 'cd', 'cds']:
-                df = df[df['group'].str.lower() == 'music']
+                mask &= self._category_equals(products, 'group', 'music')
             elif category.lower() in ['dvd', 'dvds']:
-                df = df[df['group'].str.lower() == 'dvd']
+                mask &= self._category_equals(products, 'group', 'dvd')
             elif category.lower() in ['video', 'videos']:
-                df = df[df['group'].str.lower() == 'video']
+                mask &= self._category_equals(products, 'group', 'video')
             else:
                 # Try to match main category
-                df = df[df['main_category'].str.contains(category, case=False, na=False)]
+                mask &= self._category_contains(products, 'main_category', category)
         
         # Sort by sales rank (lower is better) and get top n
-        # Exclude products without valid sales rank (inf, NaN, negative values)
-        df = df[
-            (df['salesrank'] != float('inf')) & 
-            (df['salesrank'] > 0) & 
-            (df['salesrank'].notna())
-        ]
-        df = df.sort_values('salesrank').head(n)
+        rows = np.flatnonzero(mask)
+        rows = rows[self._top_k_desc(-self._salesrank[rows], n)]
+        df = products.iloc[rows]
         
         return df[['id', 'asin', 'title', 'group', 'salesrank', 'avg_rating', 'total_reviews']]
     
@@ -165,8 +496,7 @@ class AmazonSearchEngine:
             return results
         
         # Map columns to what the web app expects
-        formatted_results = results.copy()
-        formatted_results = formatted_results.rename(columns={
+        formatted_results = results.rename(columns={
             'id': 'product_id',
             'group': 'category',
             'total_reviews': 'num_reviews'
@@ -175,8 +505,10 @@ class AmazonSearchEngine:
         # Add missing columns with default values
         formatted_results['brand'] = formatted_results.get('brand', '')
         formatted_results['price'] = formatted_results.get('price', 0.0)
-        formatted_results['popularity_score'] = formatted_results['salesrank'].apply(
-            lambda x: max(0, (1000000 - x) / 10000) if x != float('inf') else 0
+        # Products without a valid salesrank have no popularity
+        salesrank_valid = self.products_df['salesrank_valid'].loc[formatted_results.index]
+        formatted_results['popularity_score'] = np.where(
+            salesrank_valid, np.maximum(0, (1000000 - formatted_results['salesrank']) / 10000), 0.0
         )
         
         return formatted_results
@@ -193,18 +525,9 @@ class AmazonSearchEngine:
         Returns:
             DataFrame with matching products
         """
-        if operator_str not in SearchOperator.OPERATORS:
-            raise ValueError(f"Unsupported operator: {operator_str}")
-        
-        df = self.products_df.copy()
-        op_func = SearchOperator.OPERATORS[operator_str]
-        
-        # Apply rating filter
-        mask = op_func(df['avg_rating'], rating_value)
-        df = df[mask]
-        
-        # Sort by rating descending and limit results
-        df = df.sort_values('avg_rating', ascending=False).head(limit)
+        # Apply rating filter, sort by rating descending and limit results
+        rows = self._numeric_top_k(self._avg_rating, operator_str, rating_value, limit)
+        df = self.products_df.iloc[rows]
         
         return df[['id', 'asin', 'title', 'group', 'avg_rating', 'total_reviews', 'salesrank']]
     
@@ -220,18 +543,9 @@ class AmazonSearchEngine:
         Returns:
             DataFrame with matching products
         """
-        if operator_str not in SearchOperator.OPERATORS:
-            raise ValueError(f"Unsupported operator: {operator_str}")
-        
-        df = self.products_df.copy()
-        op_func = SearchOperator.OPERATORS[operator_str]
-        
-        # Apply review count filter
-        mask = op_func(df['total_reviews'], review_count)
-        df = df[mask]
-        
-        # Sort by review count descending and limit results
-        df = df.sort_values('total_reviews', ascending=False).head(limit)
+        # Apply review count filter, sort by review count descending and limit results
+        rows = self._numeric_top_k(self._total_reviews, operator_str, review_count, limit)
+        df = self.products_df.iloc[rows]
         
         return df[['id', 'asin', 'title', 'group', 'total_reviews', 'avg_rating', 'salesrank']]
     
@@ -246,9 +560,9 @@ class AmazonSearchEngine:
             Dictionary with co-purchasing analysis
         """
         # Find similar products for the given ASIN
-        similar_products = self.similar_products_df[
-            self.similar_products_df['product_asin'] == product_asin
-        ]['similar_asin'].tolist()
+        no_rows = np.empty(0, dtype=np.intp)
+        similar_rows = self._similar_idx_by_asin.get(product_asin, no_rows)
+        similar_products = self.similar_products_df['similar_asin'].iloc[similar_rows].tolist()
         
         if not similar_products:
             return {
@@ -259,17 +573,16 @@ class AmazonSearchEngine:
             }
         
         # Find customers who reviewed the original product
-        original_reviewers = self.reviews_df[
-            self.reviews_df['product_asin'] == product_asin
-        ]['customer_id'].unique()
+        original_reviewers = np.unique(
+            self._review_customer_codes[self._review_idx_by_asin.get(product_asin, no_rows)]
+        )
         
         # Find customers who also reviewed similar products
-        similar_reviewers = self.reviews_df[
-            self.reviews_df['product_asin'].isin(similar_products)
-        ]['customer_id'].unique()
+        similar_review_rows = [self._review_idx_by_asin.get(asin, no_rows) for asin in set(similar_products)]
+        similar_reviewers = np.unique(self._review_customer_codes[np.concatenate(similar_review_rows)])
         
         # Find intersection (co-purchasing users)
-        co_purchasing_users = set(original_reviewers) & set(similar_reviewers)
+        co_purchasing_users = np.intersect1d(original_reviewers, similar_reviewers, assume_unique=True)
         
         return {
             'product_asin': product_asin,
@@ -287,7 +600,7 @@ class AmazonSearchEngine:
         Args:
             query_params: Dictionary containing search parameters
                 - text: Text search in title/category
-                - category: Product category filter
+                - category: Product category filter, or a list of product groups
                 - rating_op: Rating operator (>, >=, =, <, <=)
                 - rating_value: Rating value
                 - reviews_op: Reviews count operator
@@ -297,62 +610,50 @@ class AmazonSearchEngine:
         Returns:
             DataFrame with search results
         """
-        df = self.products_df.copy()
-        
-        # Text search
-        if 'text' in query_params and query_params['text']:
-            text = query_params['text'].lower()
-            mask = df['search_text'].str.contains(text, na=False)
-            df = df[mask]
+        # Filters combine into a single row mask; only matching rows are ever materialized
+        products = self.products_df
+        mask = np.ones(len(products), dtype=bool)
         
         # Category filter
-        if 'category' in query_params and query_params['category']:
+        if 'category' in query_params and isinstance(query_params['category'], (list, tuple, set)):
+            # Several product groups: one membership test on the group codes
+            mask &= self._category_isin(products, 'group', query_params['category'])
+        elif 'category' in query_params and query_params['category']:
             category = query_params['category'].lower()
             # Check if it's a main group category
             if category in ['book', 'music', 'dvd', 'video', 'toy', 'software', 'ce', 'video games', 'baby product', 'sports']:
-                df = df[df['group'].str.lower() == category]
+                mask &= self._category_equals(products, 'group', category)
             else:
                 # Fallback to main_category search for sub-categories
-                df = df[df['main_category'].str.contains(category, case=False, na=False)]
+                mask &= self._category_contains(products, 'main_category', category)
         
-        # Rating filter
+        # Rating and review count filters are evaluated together in one pass
+        comparisons = []
         if 'rating_op' in query_params and 'rating_value' in query_params:
-            op_str = query_params['rating_op']
-            value = float(query_params['rating_value'])
-            if op_str in SearchOperator.OPERATORS:
-                op_func = SearchOperator.OPERATORS[op_str]
-                mask = op_func(df['avg_rating'], value)
-                df = df[mask]
-        
-        # Reviews count filter
+            comparisons.append((self._avg_rating, query_params['rating_op'], float(query_params['rating_value'])))
         if 'reviews_op' in query_params and 'reviews_value' in query_params:
-            op_str = query_params['reviews_op']
-            value = int(query_params['reviews_value'])
-            if op_str in SearchOperator.OPERATORS:
-                op_func = SearchOperator.OPERATORS[op_str]
-                mask = op_func(df['total_reviews'], value)
-                df = df[mask]
+            comparisons.append((self._total_reviews, query_params['reviews_op'], int(query_params['reviews_value'])))
+        mask = self._apply_numeric_filters(mask, comparisons)
+        
+        # Text search runs last, so a selective structural filter shrinks what it scans
+        if 'text' in query_params and query_params['text']:
+            text = query_params['text'].lower()
+            mask = self._filter_search_text(mask, text)
+        
+        rows = np.flatnonzero(mask)
         
         # Sort and limit results
-        if len(df) > 0:
-            # Sort by relevance (combination of rating and review count)
-            # Handle invalid salesrank values (negative, inf, or NaN)
-            valid_salesrank = df['salesrank'].copy()
-            valid_salesrank = valid_salesrank.replace([-1, np.inf, -np.inf], np.nan)
-            valid_salesrank = valid_salesrank.fillna(1000000)  # Default high rank for missing data
-            
-            df['relevance_score'] = (
-                df['avg_rating'] * 0.4 + 
-                np.log1p(df['total_reviews']) * 0.3 +
-                (1.0 / (1.0 + valid_salesrank)) * 1000 * 0.3
-            )
-            df = df.sort_values('relevance_score', ascending=False)
-            
+        if len(rows) > 0:
+            # Sort by relevance (combination of rating and review count); products
+            # without a valid salesrank get a default high rank. Scoring and top-k
+            # selection happen together, so only the returned rows get a score.
             limit = query_params.get('limit', 50)
-            df = df.head(limit)
+            top, relevance_score = relevance_top_k(self._avg_rating, self._total_reviews, self._salesrank,
+                                                   self._salesrank_valid, rows, limit)
+            df = products.iloc[rows[top]][['id', 'asin', 'title', 'group', 'main_category', 'avg_rating',
+                                            'total_reviews', 'salesrank']]
             
-            return df[['id', 'asin', 'title', 'group', 'main_category', 'avg_rating', 
-                      'total_reviews', 'salesrank', 'relevance_score']]
+            return df.assign(relevance_score=relevance_score)
         else:
             # Return empty DataFrame with proper columns
             return pd.DataFrame(columns=['id', 'asin', 'title', 'group', 'main_category', 
@@ -365,18 +666,34 @@ class AmazonSearchEngine:
         Returns:
             DataFrame with category statistics
         """
-        stats = self.products_df.groupby('group').agg({
-            'id': 'count',
-            'avg_rating': 'mean',
-            'total_reviews': 'sum',
-            'salesrank': lambda x: (x != float('inf')).sum()
-        }).round(2)
-        
-        stats.columns = ['total_products', 'avg_rating', 'total_reviews', 'products_with_salesrank']
-        stats = stats.reset_index()
-        stats = stats.sort_values('total_products', ascending=False)
-        
-        return stats
+        # Products are static once loaded, so the statistics are computed only once
+        if self._category_stats is not None:
+            return self._category_stats.copy()
+        
+        table = pa.Table.from_pandas(
+            self.products_df[['group', 'id', 'avg_rating', 'total_reviews', 'salesrank_valid']],
+            preserve_index=False
+        )
+        
+        # Single hash aggregation in Arrow; null groups are dropped like pandas groupby does
+        table = table.filter(pc.is_valid(table['group']))
+        stats = table.group_by('group').aggregate([
+            ('id', 'count'),
+            ('avg_rating', 'mean'),
+            ('total_reviews', 'sum'),
+            ('salesrank_valid', 'sum')
+        ]).to_pandas()
+        
+        stats = stats.rename(columns={
+            'id_count': 'total_products',
+            'avg_rating_mean': 'avg_rating',
+            'total_reviews_sum': 'total_reviews',
+            'salesrank_valid_sum': 'products_with_salesrank'
+        })[['group', 'total_products', 'avg_rating', 'total_reviews', 'products_with_salesrank']]
+        stats['products_with_salesrank'] = stats['products_with_salesrank'].astype(np.int64)
+        self._category_stats = stats.round(2).sort_values('total_products', ascending=False)
+        
+        return self._category_stats.copy()
     
     def search_by_text(self, text: str, limit: int = 50) -> pd.DataFrame:
         """
@@ -392,26 +709,26 @@ class AmazonSearchEngine:
         if not text:
             return pd.DataFrame()
         
-        df = self.products_df.copy()
         text = text.lower()
         
-        # Search in title and category
-        mask = df['search_text'].str.contains(text, na=False)
-        df = df[mask]
+        # Search in title and category, falling back to fuzzy token matching
+        rows = np.flatnonzero(self._match_search_text(text))
+        if len(rows) == 0 and SEARCH_CONFIG['enable_fuzzy_search']:
+            rows = self._fuzzy_match(text)
+        df = self.products_df.iloc[rows]
         
-        # Calculate relevance score based on text match quality
-        df['text_relevance'] = df['search_text'].apply(
-            lambda x: SequenceMatcher(None, text, x).ratio()
-        )
+        # Calculate relevance score based on token overlap with the query
+        text_relevance = self._token_jaccard(text, rows)
         
         # Sort by text relevance and other factors
-        df['relevance_score'] = (
-            df['text_relevance'] * 0.5 +
-            (df['avg_rating'] / 5.0) * 0.3 +
-            np.log1p(df['total_reviews']) / 10.0 * 0.2
+        relevance_score = (
+            text_relevance * 0.5 +
+            (df['avg_rating'].to_numpy() / 5.0) * 0.3 +
+            np.log1p(df['total_reviews'].to_numpy()) / 10.0 * 0.2
         )
         
-        df = df.sort_values('relevance_score', ascending=False).head(limit)
+        top = self._top_k_desc(relevance_score, limit)
+        df = df.iloc[top].assign(relevance_score=relevance_score[top])
         
         return df[['id', 'asin', 'title', 'group', 'main_category', 'avg_rating', 
                   'total_reviews', 'relevance_score']]
@@ -436,20 +753,18 @@ class AmazonSearchEngine:
         
         product = product.iloc[0]
         
+        no_rows = np.empty(0, dtype=np.intp)
+        
         # Get categories for this product
-        categories = self.categories_df[
-            self.categories_df['product_id'] == product['id']
-        ]['category_path'].tolist()
+        category_rows = self._categories_idx_by_pid.get(product['id'], no_rows)
+        categories = self.categories_df['category_path'].iloc[category_rows].tolist()
         
         # Get similar products
-        similar = self.similar_products_df[
-            self.similar_products_df['product_asin'] == product['asin']
-        ]['similar_asin'].tolist()
+        similar_rows = self._similar_idx_by_asin.get(product['asin'], no_rows)
+        similar = self.similar_products_df['similar_asin'].iloc[similar_rows].tolist()
         
         # Get recent reviews
-        recent_reviews = self.reviews_df[
-            self.reviews_df['product_asin'] == product['asin']
-        ].head(5)
+        recent_reviews = self.reviews_df.iloc[self._review_idx_by_asin.get(product['asin'], no_rows)[:5]]
         
         return {
             'id': product['id'],
@@ -459,7 +774,7 @@ class AmazonSearchEngine:
             'main_category': product.get('main_category', ''),
             'avg_rating': product['avg_rating'],
             'total_reviews': product['total_reviews'],
-            'salesrank': product['salesrank'],
+            'salesrank': product['salesrank'] if product['salesrank_valid'] else None,
             'categories': categories,
             'similar_products': similar[:10],
             'recent_reviews': recent_reviews.to_dict('records') if not recent_reviews.empty else []
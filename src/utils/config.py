@@ -43,7 +43,10 @@ SEARCH_CONFIG = {
     "max_results": 100,
     "default_page_size": 20,
     "enable_fuzzy_search": True,
-    "similarity_threshold": 0.7
+    "similarity_threshold": 0.7,
+    "compiled_pattern_cache_size": 256,
+    "parsed_query_cache_size": 4096,
+    "text_scan_selectivity": 4  # Scan only surviving rows when fewer than 1/N of products remain
 }
 
 # Recommender system configuration
@@ -74,7 +77,26 @@ WEB_CONFIG = {
     "host": "127.0.0.1",
     "port": 5000,
     "debug": True,
-    "secret_key": os.environ.get("SECRET_KEY", "dev-secret-key")
+    "secret_key": os.environ.get("SECRET_KEY", "dev-secret-key"),
+    # Gzip JSON/HTML responses of at least this many bytes for clients that accept it
+    "compress_min_size": 1024,
+    "compress_level": 6
+}
+
+# API response cache configuration
+CACHE_CONFIG = {
+    # Shared Redis cache; responses are cached in-process when unset or redis is not installed
+    "redis_url": os.environ.get("REDIS_URL"),
+    # Seconds a cached response is served before it is regenerated
+    "policies": {
+        # Dataset-wide aggregates that only change when the data is reloaded
+        "static": 300
+    },
+    # Seconds a stale response is kept as a fallback for failing handlers
+    "stale_retention": 3600,
+    "max_local_entries": 1024,
+    # Seconds browsers may reuse responses validated by the data ETag before revalidating
+    "client_max_age": 300
 }
 
 # Logging configuration
@@ -6,6 +6,7 @@ import time
 import functools
 import pandas as pd
 import numpy as np
+import pyarrow.parquet as pq
 from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 import requests
@@ -13,7 +14,7 @@ from tqdm import tqdm
 import gzip
 import shutil
 
-from .config import LOG_CONFIG
+from .config import LOG_CONFIG, PROCESSED_DATA_DIR
 
 
 def setup_logging():
@@ -149,6 +150,42 @@ def extract_gzip(source_file: Path, destination_file: Path) -> bool:
         return False
 
 
+def load_processed_table(name: str, columns: Optional[List[str]] = None,
+                         categorical: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load a processed dataset, reading only the requested columns
+    
+    A Parquet file is preferred when present so the column projection is
+    pushed down to the reader; it is memory-mapped rather than copied into
+    memory first. Otherwise the CSV file is parsed with usecols.
+    
+    Args:
+        name: File stem in the processed data directory (e.g. "amazon_products")
+        columns: Columns to load, or None for all columns
+        categorical: Columns to load as pandas Categorical (e.g. repeated ids),
+            so comparisons, isin and groupby work on integer codes
+        
+    Returns:
+        pd.DataFrame: Loaded data
+    """
+    parquet_path = PROCESSED_DATA_DIR / f"{name}.parquet"
+    if parquet_path.exists():
+        # Memory-map the file so the OS page cache serves the column chunks, and
+        # release each Arrow buffer as soon as its column has been converted
+        table = pq.read_table(parquet_path, columns=columns, memory_map=True)
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+        # Dictionary-encoded Parquet columns already arrive as Categorical
+        for column in categorical or []:
+            if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+                df[column] = df[column].astype('category')
+        return df
+    
+    dtype = {column: 'category' for column in categorical or []}
+    if columns is not None:
+        dtype = {column: kind for column, kind in dtype.items() if column in columns}
+    return pd.read_csv(PROCESSED_DATA_DIR / f"{name}.csv", usecols=columns, dtype=dtype or None)
+
+
 def calculate_similarity(vector1: np.ndarray, vector2: np.ndarray, 
                         metric: str = "cosine") -> float:
     """
@@ -3,14 +3,83 @@ Performance Dashboard for Amazon Recommender System
 Monitors system performance, user engagement, and recommendation quality
 """
 
+import sys
 import time
+import functools
+import heapq
+import threading
+from operator import itemgetter
 import psutil
 import numpy as np
 from datetime import datetime, timedelta
-from collections import defaultdict, deque
+from collections import Counter
 import json
 import logging
 
+try:
+    import orjson
+except ImportError:  # optional fast encoder; the json module is used without it
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # optional JIT; np.mean/np.percentile are used without it
+    njit = None
+
+
+def _mean_p95(values):
+    """Mean and linearly interpolated 95th percentile of values"""
+    values = np.sort(values)
+    n = values.shape[0]
+    total = 0.0
+    for i in range(n):
+        total += values[i]
+    
+    position = 0.95 * (n - 1)
+    lower = int(position)
+    upper = min(lower + 1, n - 1)
+    return total / n, values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+if njit is not None:
+    _mean_p95 = njit(cache=True)(_mean_p95)
+else:
+    _mean_p95 = None
+
+class RingBuffer:
+    """
+    Fixed-capacity history of floats backed by a preallocated NumPy array
+    
+    Once full, each append overwrites the oldest value.
+    """
+    
+    def __init__(self, capacity):
+        self._data = np.empty(capacity, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+    
+    def append(self, value):
+        """Store a value, replacing the oldest one when full"""
+        self._data[self._next] = value
+        self._next = (self._next + 1) % len(self._data)
+        if self._count < len(self._data):
+            self._count += 1
+    
+    def values(self):
+        """Values in insertion order; a view of the buffer until it wraps around"""
+        if self._count < len(self._data):
+            return self._data[:self._count]
+        return np.concatenate((self._data[self._next:], self._data[:self._next]))
+    
+    def clear(self):
+        """Drop all values"""
+        self._next = 0
+        self._count = 0
+    
+    def __len__(self):
+        return self._count
+
+
 class PerformanceDashboard:
     """
     Real-time performance monitoring and analytics dashboard
@@ -18,32 +87,70 @@ class PerformanceDashboard:
     
     def __init__(self, config=None):
         self.config = config or {}
-        self.metrics = defaultdict(deque)
+        # Per-endpoint (response time, timestamp) histories, created on first request
+        self._endpoint_state = {}
         self.start_time = time.time()
         self.request_count = 0
         self.error_count = 0
-        self.response_times = deque(maxlen=1000)
-        self.memory_usage = deque(maxlen=100)
-        self.cpu_usage = deque(maxlen=100)
-        
-        # Recommendation quality metrics
-        self.recommendation_stats = {
-            'total_generated': 0,
-            'user_clicks': 0,
-            'conversions': 0,
-            'avg_relevance_score': 0.0
-        }
+        self.response_times = RingBuffer(1000)
+        self.memory_usage = RingBuffer(100)
+        self.cpu_usage = RingBuffer(100)
+        
+        # Recommendation quality metrics, kept as plain counters on the write path
+        self._total_generated = 0
+        self._user_clicks = 0
+        self._conversions = 0
         
         # Search performance metrics
         self.search_stats = {
             'total_queries': 0,
-            'avg_response_time': 0.0,
             'zero_results_count': 0,
-            'popular_queries': defaultdict(int)
+            'popular_queries': Counter()
         }
+        self._reset_rates()
+        
+        # Running totals; averages are only derived when the dashboard is read
+        self._search_time_sum = 0.0
+        self._relevance_sum = 0.0
+        self._scored_count = 0
+        
+        # Top queries are recomputed only after a new search has been logged
+        self._top_queries_cache = []
+        self._top_queries_dirty = False
+        
+        # Distinct queries kept; the rarest are evicted in bulk beyond this
+        self._max_tracked_queries = self.config.get('max_tracked_queries', 100000)
+        
+        # System metrics are sampled by a background thread started on first use;
+        # _monitor_lock also guards the memory and CPU histories it appends to
+        self._monitor_interval = self.config.get('system_metrics_interval', 1.0)
+        self._monitor_thread = None
+        self._monitor_lock = threading.Lock()
+        self._monitor_stop = threading.Event()
         
         self.logger = logging.getLogger(__name__)
     
+    def _reset_rates(self):
+        """Zero the derived rates; each is refreshed when one of its counters changes"""
+        self._error_rate = 0
+        self._click_through_rate = 0
+        self._conversion_rate = 0
+        self._zero_results_rate = 0
+    
+    @property
+    def recommendation_stats(self):
+        """Recommendation counters and average relevance as a dictionary"""
+        return {
+            'total_generated': self._total_generated,
+            'user_clicks': self._user_clicks,
+            'conversions': self._conversions,
+            'avg_relevance_score': self._avg_relevance_score()
+        }
+    
+    def _avg_relevance_score(self):
+        """Mean relevance over the recommendation calls that were logged with scores"""
+        return self._relevance_sum / self._scored_count if self._scored_count > 0 else 0.0
+    
     def log_request(self, endpoint, response_time, status_code=200):
         """Log API request metrics"""
         self.request_count += 1
@@ -51,135 +158,196 @@ class PerformanceDashboard:
         
         if status_code >= 400:
             self.error_count += 1
+        self._error_rate = self.error_count / self.request_count * 100
         
         # Store endpoint-specific metrics
-        self.metrics[f"{endpoint}_response_time"].append(response_time)
-        self.metrics[f"{endpoint}_requests"].append(time.time())
-        
-        self.logger.info(f"Request: {endpoint}, Time: {response_time:.3f}s, Status: {status_code}")
+        state = self._endpoint_state.get(endpoint)
+        if state is None:
+            state = self._endpoint_state[sys.intern(endpoint)] = (RingBuffer(4096), RingBuffer(4096))
+        state[0].append(response_time)
+        state[1].append(time.time())
+        
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Request: %s, Time: %.3fs, Status: %d", endpoint, response_time, status_code)
     
     def log_recommendation(self, user_id, item_ids, relevance_scores=None):
         """Log recommendation generation"""
-        self.recommendation_stats['total_generated'] += 1
-        
-        if relevance_scores:
-            avg_relevance = np.mean(relevance_scores)
-            self.recommendation_stats['avg_relevance_score'] = (
-                (self.recommendation_stats['avg_relevance_score'] * 
-                 (self.recommendation_stats['total_generated'] - 1) + avg_relevance) /
-                self.recommendation_stats['total_generated']
-            )
-        
-        self.logger.info(f"Recommendations generated for user {user_id}: {len(item_ids)} items")
+        self._total_generated += 1
+        self._click_through_rate = self._user_clicks / self._total_generated * 100
+        
+        if isinstance(relevance_scores, np.ndarray):
+            if relevance_scores.size > 0:
+                self._relevance_sum += float(relevance_scores.mean())
+                self._scored_count += 1
+        elif relevance_scores:
+            # Score lists are short; a builtin sum avoids building an array
+            self._relevance_sum += sum(relevance_scores) / len(relevance_scores)
+            self._scored_count += 1
+        
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Recommendations generated for user %s: %d items", user_id, len(item_ids))
     
     def log_search(self, query, response_time, result_count):
         """Log search query metrics"""
         self.search_stats['total_queries'] += 1
-        self.search_stats['popular_queries'][query.lower()] += 1
+        # Interned keys let repeated queries share one string
+        popular_queries = self.search_stats['popular_queries']
+        popular_queries[sys.intern(query.lower())] += 1
+        self._top_queries_dirty = True
         
-        # Update average response time
-        total_time = (self.search_stats['avg_response_time'] * 
-                     (self.search_stats['total_queries'] - 1) + response_time)
-        self.search_stats['avg_response_time'] = total_time / self.search_stats['total_queries']
+        if len(popular_queries) > self._max_tracked_queries:
+            # Evict the least frequent 1% in one pass rather than on every insert
+            n_evict = max(1, len(popular_queries) // 100)
+            for rare_query, _ in heapq.nsmallest(n_evict, popular_queries.items(), key=itemgetter(1)):
+                del popular_queries[rare_query]
+        
+        self._search_time_sum += response_time
         
         if result_count == 0:
             self.search_stats['zero_results_count'] += 1
+        self._zero_results_rate = self.search_stats['zero_results_count'] / self.search_stats['total_queries'] * 100
         
-        self.logger.info(f"Search: '{query}' - {result_count} results in {response_time:.3f}s")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("Search: '%s' - %d results in %.3fs", query, result_count, response_time)
     
     def log_user_interaction(self, user_id, item_id, interaction_type):
         """Log user interactions (click, purchase, etc.)"""
         if interaction_type == 'click':
-            self.recommendation_stats['user_clicks'] += 1
+            self._user_clicks += 1
+            if self._total_generated > 0:
+                self._click_through_rate = self._user_clicks / self._total_generated * 100
         elif interaction_type == 'purchase':
-            self.recommendation_stats['conversions'] += 1
+            self._conversions += 1
+        
+        if self._user_clicks > 0:
+            self._conversion_rate = self._conversions / self._user_clicks * 100
         
-        self.logger.info(f"User {user_id} {interaction_type} on item {item_id}")
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("User %s %s on item %s", user_id, interaction_type, item_id)
     
     def update_system_metrics(self):
-        """Update system resource metrics"""
-        # Memory usage
-        memory = psutil.virtual_memory()
-        self.memory_usage.append(memory.percent)
-        
-        # CPU usage
-        cpu = psutil.cpu_percent(interval=1)
+        """
+        Make sure system resource metrics are being collected
+        
+        Readings are taken by a background thread once per interval, so this
+        returns immediately instead of blocking the caller while CPU is measured.
+        """
+        if self._monitor_thread is not None:
+            return
+        
+        with self._monitor_lock:
+            if self._monitor_thread is None:
+                # Take one reading now so the dashboard has data before the first interval;
+                # psutil measures CPU since its import or the previous call
+                self._record_system_metrics()
+                self._monitor_stop.clear()
+                self._monitor_thread = threading.Thread(
+                    target=self._monitor_system, name="system-metrics", daemon=True
+                )
+                self._monitor_thread.start()
+    
+    def stop_system_monitor(self):
+        """Stop the background system metrics thread"""
+        with self._monitor_lock:
+            monitor_thread, self._monitor_thread = self._monitor_thread, None
+            if monitor_thread is not None:
+                self._monitor_stop.set()
+        # Join outside the lock, which the sampler takes to record its last reading
+        if monitor_thread is not None:
+            monitor_thread.join()
+    
+    def _record_system_metrics(self):
+        """Append one memory and CPU reading; the caller holds _monitor_lock"""
+        memory = psutil.virtual_memory().percent
+        # CPU usage since the previous reading
+        cpu = psutil.cpu_percent(interval=None)
+        self.memory_usage.append(memory)
         self.cpu_usage.append(cpu)
         
-        self.logger.debug(f"System metrics - Memory: {memory.percent:.1f}%, CPU: {cpu:.1f}%")
+        self.logger.debug("System metrics - Memory: %.1f%%, CPU: %.1f%%", memory, cpu)
+    
+    def _monitor_system(self):
+        """Sample memory and CPU usage until stopped"""
+        while not self._monitor_stop.wait(self._monitor_interval):
+            with self._monitor_lock:
+                self._record_system_metrics()
+    
+    def _system_metrics_snapshot(self):
+        """Copies of the memory and CPU histories, taken under the sampler's lock"""
+        with self._monitor_lock:
+            return self.memory_usage.values().copy(), self.cpu_usage.values().copy()
     
     def get_dashboard_data(self):
         """Get comprehensive dashboard data"""
         current_time = time.time()
         uptime = current_time - self.start_time
         
-        # Calculate rates
+        # Request rate depends on uptime; the other rates are kept current by the log_* methods
         requests_per_minute = (self.request_count / uptime) * 60 if uptime > 0 else 0
-        error_rate = (self.error_count / self.request_count * 100) if self.request_count > 0 else 0
         
         # Response time statistics
-        response_times_list = list(self.response_times)
-        avg_response_time = np.mean(response_times_list) if response_times_list else 0
-        p95_response_time = np.percentile(response_times_list, 95) if response_times_list else 0
+        response_times = self.response_times.values()
+        avg_response_time = p95_response_time = 0
+        if len(response_times) > 0:
+            if _mean_p95 is not None:
+                avg_response_time, p95_response_time = _mean_p95(response_times)
+            else:
+                avg_response_time = np.mean(response_times)
+                p95_response_time = np.percentile(response_times, 95)
         
         # Memory and CPU averages
-        avg_memory = np.mean(list(self.memory_usage)) if self.memory_usage else 0
-        avg_cpu = np.mean(list(self.cpu_usage)) if self.cpu_usage else 0
+        memory_history, cpu_history = self._system_metrics_snapshot()
+        avg_memory = memory_history.mean() if len(memory_history) > 0 else 0
+        avg_cpu = cpu_history.mean() if len(cpu_history) > 0 else 0
+        
+        # Averages from the running totals
+        avg_relevance_score = self._avg_relevance_score()
+        total_queries = self.search_stats['total_queries']
+        avg_search_time = self._search_time_sum / total_queries if total_queries > 0 else 0.0
         
         # Top search queries
-        top_queries = sorted(
-            self.search_stats['popular_queries'].items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:10]
+        if self._top_queries_dirty:
+            self._top_queries_cache = heapq.nlargest(
+                10, self.search_stats['popular_queries'].items(), key=itemgetter(1)
+            )
+            self._top_queries_dirty = False
+        top_queries = list(self._top_queries_cache)
         
         dashboard_data = {
             'system_overview': {
                 'uptime_hours': uptime / 3600,
                 'total_requests': self.request_count,
                 'requests_per_minute': round(requests_per_minute, 2),
-                'error_rate_percent': round(error_rate, 2),
+                'error_rate_percent': round(self._error_rate, 2),
                 'avg_response_time_ms': round(avg_response_time * 1000, 2),
                 'p95_response_time_ms': round(p95_response_time * 1000, 2)
             },
             'resource_usage': {
                 'memory_usage_percent': round(avg_memory, 1),
                 'cpu_usage_percent': round(avg_cpu, 1),
-                'memory_history': list(self.memory_usage),
-                'cpu_history': list(self.cpu_usage)
+                'memory_history': memory_history.tolist(),
+                'cpu_history': cpu_history.tolist()
             },
             'recommendation_metrics': {
-                'total_recommendations': self.recommendation_stats['total_generated'],
-                'user_clicks': self.recommendation_stats['user_clicks'],
-                'conversions': self.recommendation_stats['conversions'],
-                'click_through_rate': (
-                    (self.recommendation_stats['user_clicks'] / 
-                     self.recommendation_stats['total_generated'] * 100)
-                    if self.recommendation_stats['total_generated'] > 0 else 0
-                ),
-                'conversion_rate': (
-                    (self.recommendation_stats['conversions'] / 
-                     self.recommendation_stats['user_clicks'] * 100)
-                    if self.recommendation_stats['user_clicks'] > 0 else 0
-                ),
-                'avg_relevance_score': round(self.recommendation_stats['avg_relevance_score'], 3)
+                'total_recommendations': self._total_generated,
+                'user_clicks': self._user_clicks,
+                'conversions': self._conversions,
+                'click_through_rate': self._click_through_rate,
+                'conversion_rate': self._conversion_rate,
+                'avg_relevance_score': round(avg_relevance_score, 3)
             },
             'search_metrics': {
                 'total_searches': self.search_stats['total_queries'],
-                'avg_search_time_ms': round(self.search_stats['avg_response_time'] * 1000, 2),
-                'zero_results_rate': (
-                    (self.search_stats['zero_results_count'] / 
-                     self.search_stats['total_queries'] * 100)
-                    if self.search_stats['total_queries'] > 0 else 0
-                ),
+                'avg_search_time_ms': round(avg_search_time * 1000, 2),
+                'zero_results_rate': self._zero_results_rate,
                 'top_queries': top_queries
             },
             'performance_trends': {
-                'response_times': list(self.response_times)[-50:],  # Last 50 requests
+                'response_times': response_times[-50:].tolist(),  # Last 50 requests
                 'requests_over_time': self._get_requests_over_time(),
                 'errors_over_time': self._get_errors_over_time()
             },
-            'health_status': self._get_health_status()
+            'health_status': self._get_health_status(memory_history, cpu_history)
         }
         
         return dashboard_data
@@ -189,16 +357,15 @@ class PerformanceDashboard:
         current_time = time.time()
         hour_ago = current_time - 3600
         
-        # Count requests in 5-minute buckets
-        buckets = defaultdict(int)
-        for endpoint in self.metrics:
-            if endpoint.endswith('_requests'):
-                for timestamp in self.metrics[endpoint]:
-                    if timestamp >= hour_ago:
-                        bucket = int((timestamp - hour_ago) // 300)  # 5-minute buckets
-                        buckets[bucket] += 1
+        # Count requests in 5-minute buckets with one bincount over all endpoints
+        if not self._endpoint_state:
+            return {}
+        timestamps = np.concatenate([timestamps.values() for _, timestamps in self._endpoint_state.values()])
+        timestamps = timestamps[timestamps >= hour_ago]
+        buckets = ((timestamps - hour_ago) // 300).astype(np.int64)
+        counts = np.bincount(buckets, minlength=12)
         
-        return dict(buckets)
+        return {bucket: int(count) for bucket, count in enumerate(counts) if count}
     
     def _get_errors_over_time(self):
         """Get error count over time"""
@@ -206,35 +373,34 @@ class PerformanceDashboard:
         # For now, return a simple metric
         return {'last_hour': self.error_count}
     
-    def _get_health_status(self):
-        """Determine overall system health"""
+    def _get_health_status(self, memory_history, cpu_history):
+        """Determine overall system health from snapshots of the resource histories"""
         health_score = 100
         status = "Healthy"
         issues = []
         
         # Check error rate
-        error_rate = (self.error_count / self.request_count * 100) if self.request_count > 0 else 0
-        if error_rate > 5:
+        if self._error_rate > 5:
             health_score -= 20
-            issues.append(f"High error rate: {error_rate:.1f}%")
+            issues.append(f"High error rate: {self._error_rate:.1f}%")
         
         # Check response time
         if self.response_times:
-            avg_time = np.mean(list(self.response_times))
+            avg_time = self.response_times.values().mean()
             if avg_time > 1.0:  # > 1 second
                 health_score -= 15
                 issues.append(f"Slow response time: {avg_time:.2f}s")
         
         # Check memory usage
-        if self.memory_usage:
-            current_memory = self.memory_usage[-1]
+        if len(memory_history) > 0:
+            current_memory = float(memory_history[-1])
             if current_memory > 80:
                 health_score -= 20
                 issues.append(f"High memory usage: {current_memory:.1f}%")
         
         # Check CPU usage
-        if self.cpu_usage:
-            current_cpu = self.cpu_usage[-1]
+        if len(cpu_history) > 0:
+            current_cpu = float(cpu_history[-1])
             if current_cpu > 80:
                 health_score -= 15
                 issues.append(f"High CPU usage: {current_cpu:.1f}%")
@@ -262,32 +428,42 @@ class PerformanceDashboard:
         data = self.get_dashboard_data()
         data['export_timestamp'] = datetime.now().isoformat()
         
-        with open(filepath, 'w') as f:
-            json.dump(data, f, indent=2)
+        if orjson is not None:
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if self.config.get('debug'):
+                option |= orjson.OPT_INDENT_2
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(data, option=option))
+        else:
+            with open(filepath, 'w') as f:
+                json.dump(data, f, indent=2 if self.config.get('debug') else None)
         
         self.logger.info(f"Metrics exported to {filepath}")
         return filepath
     
     def reset_metrics(self):
         """Reset all metrics (useful for testing)"""
-        self.metrics.clear()
+        self._endpoint_state.clear()
         self.request_count = 0
         self.error_count = 0
         self.response_times.clear()
-        self.memory_usage.clear()
-        self.cpu_usage.clear()
-        self.recommendation_stats = {
-            'total_generated': 0,
-            'user_clicks': 0,
-            'conversions': 0,
-            'avg_relevance_score': 0.0
-        }
+        with self._monitor_lock:
+            self.memory_usage.clear()
+            self.cpu_usage.clear()
+        self._total_generated = 0
+        self._user_clicks = 0
+        self._conversions = 0
         self.search_stats = {
             'total_queries': 0,
-            'avg_response_time': 0.0,
             'zero_results_count': 0,
-            'popular_queries': defaultdict(int)
+            'popular_queries': Counter()
         }
+        self._reset_rates()
+        self._search_time_sum = 0.0
+        self._relevance_sum = 0.0
+        self._scored_count = 0
+        self._top_queries_cache = []
+        self._top_queries_dirty = False
         self.start_time = time.time()
         
         self.logger.info("Metrics reset successfully")
@@ -302,18 +478,24 @@ def get_dashboard():
 # Decorator for monitoring function performance
 def monitor_performance(endpoint_name):
     """Decorator to monitor function performance"""
+    # An interned name hashes once and matches the endpoint table's key by identity
+    endpoint_name = sys.intern(endpoint_name)
+    
     def decorator(func):
+        # Bind the logger and clock once so each call skips the attribute lookups
+        log_request = dashboard.log_request
+        perf_counter_ns = time.perf_counter_ns
+        
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            start_time = time.time()
+            start_time = perf_counter_ns()
             try:
                 result = func(*args, **kwargs)
-                end_time = time.time()
-                dashboard.log_request(endpoint_name, end_time - start_time, 200)
-                return result
-            except Exception as e:
-                end_time = time.time()
-                dashboard.log_request(endpoint_name, end_time - start_time, 500)
-                raise e
+            except Exception:
+                log_request(endpoint_name, (perf_counter_ns() - start_time) * 1e-9, 500)
+                raise
+            log_request(endpoint_name, (perf_counter_ns() - start_time) * 1e-9, 200)
+            return result
         return wrapper
     return decorator
 
@@ -5,10 +5,34 @@ from flask import Flask, render_template, request, jsonify
 from flask_cors import CORS
 import sys
 import os
+import time
+import functools
+import threading
+import json
+import hashlib
+import gzip
+import zlib
 import logging
 from pathlib import Path
+from dataclasses import dataclass
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson
+except ImportError:  # optional fast encoder; jsonify is used without it
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional binary encoding; API responses are JSON-only without it
+    msgpack = None
+
+try:
+    import redis
+except ImportError:  # optional shared cache; responses are cached in-process without it
+    redis = None
+
 # Add src to path to import our modules
 current_dir = Path(__file__).parent
 project_root = current_dir.parent
@@ -16,7 +40,8 @@ sys.path.append(str(project_root / "src"))
 
 from search.search_engine import AmazonSearchEngine
 from recommendation.collaborative_filter import CollaborativeFilteringRecommender
-from utils.config import WEB_CONFIG
+from recommendation import scoring as recommender_scoring
+from utils.config import WEB_CONFIG, CACHE_CONFIG
 from utils.performance_dashboard import dashboard, monitor_performance
 from utils.helpers import setup_logging
 
@@ -30,156 +55,674 @@ CORS(app)
 app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-in-production')
 
+def encode_json(payload) -> bytes:
+    """Encode a payload to JSON bytes, with orjson when it is installed"""
+    if orjson is None:
+        return app.json.dumps(payload).encode('utf-8')
+    
+    # orjson encodes NumPy scalars/arrays natively, so payloads need no casting
+    return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+def json_array_chunks(key: str, values: np.ndarray, chunk_size: int = 4096) -> tuple:
+    """Encode a {key: [...values]} JSON document as chunks of chunk_size values each"""
+    chunks = [b'{' + encode_json(key) + b':[']
+    for start in range(0, len(values), chunk_size):
+        # Encode the chunk as a list and drop its brackets
+        body = encode_json(values[start:start + chunk_size].tolist())[1:-1]
+        chunks.append(b',' + body if start else body)
+    chunks.append(b']}')
+    return tuple(chunks)
+
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+
+def wants_msgpack() -> bool:
+    """Whether the client prefers msgpack over JSON (and msgpack is installed)"""
+    return msgpack is not None and request.accept_mimetypes.best == MSGPACK_MIMETYPE
+
+def msgpack_array_chunks(key: str, values: np.ndarray, chunk_size: int = 4096) -> tuple:
+    """Pack a {key: [...values]} msgpack map as chunks of chunk_size values each"""
+    packer = msgpack.Packer(use_bin_type=True)
+    chunks = [packer.pack_map_header(1) + packer.pack(key) + packer.pack_array_header(len(values))]
+    for start in range(0, len(values), chunk_size):
+        chunks.append(b''.join(packer.pack(value) for value in values[start:start + chunk_size].tolist()))
+    return tuple(chunks)
+
+def _msgpack_default(value):
+    """Convert NumPy scalars and arrays, which msgpack cannot pack, to Python values"""
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def api_json(payload, status: int = 200):
+    """Encode an API payload as a JSON response, or msgpack when the client asks for it"""
+    if wants_msgpack():
+        body = msgpack.packb(payload, use_bin_type=True, default=_msgpack_default)
+        return app.response_class(body, status=status, mimetype=MSGPACK_MIMETYPE)
+    
+    if orjson is None:
+        response = jsonify(payload)
+        response.status_code = status
+        return response
+    
+    return app.response_class(encode_json(payload), status=status, mimetype='application/json')
+
 # Initialize search engine and recommender
 search_engine = None
 recommender = None
+_systems_initialized = False
+_init_lock = threading.Lock()
+
+# API payloads derived from the startup data, filled in by init_systems()
+_DATASET_SCALARS = None  # dataset-wide counts and means shared by /api/stats and /api/analytics
+_STATS_CACHE = None
+_CATEGORIES_JSON = None  # pre-encoded response bodies
+_CATEGORIES_MSGPACK = None
+_USERS_JSON_CHUNKS = None  # pre-encoded chunks of the streamed /api/users body
+_USERS_MSGPACK_CHUNKS = None
+_USER_TIERS = None  # user id arrays by activity tier, for /api/users/random
+_user_sampler = np.random.default_rng()
+
+# Validator for GET endpoints whose responses only change when the data is reloaded
+CONDITIONAL_GET_ENDPOINTS = {'api_categories', 'api_users', 'api_stats', 'api_best_sellers', 'api_analytics'}
+# HTML pages served from static_page()
+STATIC_PAGE_ENDPOINTS = {'home', 'search_page', 'recommendations_page', 'analytics_page', 'performance_dashboard'}
+_DATA_ETAG = None
+
+class ResponseCache:
+    """
+    Store of pre-encoded API responses, shared through Redis when configured
+
+    Each entry holds the encoded body bytes, status code, mimetype, and the times it was
+    generated and goes stale. Entries outlive their TTL so the last good
+    payload can still be served when a handler fails.
+    """
+
+    def __init__(self, redis_url: str = None, max_local_entries: int = 1024):
+        self._redis = redis.Redis.from_url(redis_url) if redis is not None and redis_url else None
+        self._local = {}
+        self._lock = threading.Lock()
+        self.max_local_entries = max_local_entries
+
+    def get(self, key: str):
+        """Return the cached entry for key, or None"""
+        if self._redis is None:
+            return self._local.get(key)
+
+        try:
+            entry = self._redis.hgetall(key)
+        except redis.RedisError as e:
+            logger.warning("Response cache read failed: %s", e)
+            return None
+        if not entry:
+            return None
+        return {
+            'body': entry[b'body'],
+            'status': int(entry[b'status']),
+            'mimetype': entry[b'mimetype'].decode(),
+            'generated_at': float(entry[b'generated_at']),
+            'stale_at': float(entry[b'stale_at'])
+        }
+
+    def clear_local(self):
+        """Drop the in-process entries (shared Redis entries expire on their own)"""
+        with self._lock:
+            self._local.clear()
+
+    def set(self, key: str, entry: dict, retention: int):
+        """Store entry under key, keeping it for retention seconds"""
+        if self._redis is None:
+            with self._lock:
+                if key not in self._local and len(self._local) >= self.max_local_entries:
+                    # Drop the oldest entry (dicts keep insertion order)
+                    del self._local[next(iter(self._local))]
+                self._local[key] = entry
+            return
+
+        try:
+            pipe = self._redis.pipeline()
+            pipe.hset(key, mapping=entry)
+            pipe.expire(key, retention)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Response cache write failed: %s", e)
+
+response_cache = ResponseCache(CACHE_CONFIG['redis_url'], CACHE_CONFIG['max_local_entries'])
+
+def cached(policy: str):
+    """
+    Cache a JSON API view's successful responses for the policy's TTL
+
+    Only for views whose payload is not already precomputed or memoised elsewhere.
+    Keys include the data ETag, so entries from other data are never served.
+
+    Args:
+        policy: Name of a TTL policy in CACHE_CONFIG['policies']
+    """
+    ttl = CACHE_CONFIG['policies'][policy]
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = f"api:{_DATA_ETAG}:{view.__name__}"
+            if wants_msgpack():
+                key = f"{key}:msgpack"
+
+            entry = response_cache.get(key)
+            if entry is not None and time.time() < entry['stale_at']:
+                return app.response_class(entry['body'], status=entry['status'], mimetype=entry['mimetype'])
+
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                now = time.time()
+                response_cache.set(key, {
+                    'body': response.get_data(),
+                    'status': response.status_code,
+                    'mimetype': response.mimetype,
+                    'generated_at': now,
+                    'stale_at': now + ttl
+                }, CACHE_CONFIG['stale_retention'])
+            elif entry is not None:
+                # Fall back to the last good payload while the systems are unavailable or failing
+                return app.response_class(entry['body'], status=entry['status'], mimetype=entry['mimetype'])
+
+            return response
+        return wrapper
+    return decorator
+
+def format_number(num):
+    """Format a count for display (e.g. 1.2M, 548K)"""
+    if num >= 1_000_000:
+        return f"{num / 1_000_000:.1f}M"
+    elif num >= 1_000:
+        return f"{num / 1_000:.0f}K"
+    else:
+        return str(num)
+
+def precompute_aggregates():
+    """Compute the stats, categories, users and user tier payloads from the loaded (read-only) data"""
+    global _DATASET_SCALARS, _STATS_CACHE, _CATEGORIES_JSON, _CATEGORIES_MSGPACK, _USERS_JSON_CHUNKS, _USERS_MSGPACK_CHUNKS, _USER_TIERS
+    products_df = search_engine.products_df
+    reviews_df = search_engine.reviews_df
+    
+    # Reduce the raw rating array directly (skipping NaN like Series.mean) rather than
+    # through pandas' reduction machinery
+    ratings = reviews_df['rating'].to_numpy(dtype=np.float64, na_value=np.nan)
+    rated = ~np.isnan(ratings)
+    
+    # Each full-column scan (nunique builds a hash table) runs once per data load
+    _DATASET_SCALARS = {
+        'total_products': len(products_df),
+        'total_ratings': len(reviews_df),
+        'total_users': reviews_df['customer_id'].nunique(),
+        'products_with_reviews': reviews_df['product_id'].nunique(),
+        'avg_rating': float(ratings[rated].mean()) if rated.any() else float('nan'),
+        'categories': products_df['main_category'].nunique() if 'main_category' in products_df.columns else 0
+    }
+    
+    _STATS_CACHE = {
+        'total_products': _DATASET_SCALARS['total_products'],
+        'total_ratings': _DATASET_SCALARS['total_ratings'],
+        'total_users': _DATASET_SCALARS['total_users'],
+        'categories': _DATASET_SCALARS['categories'],
+        'avg_rating': _DATASET_SCALARS['avg_rating'],
+        # Formatted versions for display
+        'total_products_formatted': format_number(_DATASET_SCALARS['total_products']),
+        'total_users_formatted': format_number(_DATASET_SCALARS['total_users']),
+        'total_ratings_formatted': format_number(_DATASET_SCALARS['total_ratings']),
+    }
+    
+    # Categories from the 'group' field and their counts
+    categories = products_df['group'].value_counts()
+    category_payload = {'categories': [
+        {'name': category, 'count': int(count)}
+        for category, count in categories.items()
+    ]}
+    _CATEGORIES_JSON = encode_json(category_payload)
+    if msgpack is not None:
+        _CATEGORIES_MSGPACK = msgpack.packb(category_payload, use_bin_type=True)
+    
+    # All user ids, encoded once in the chunks /api/users streams
+    _USERS_JSON_CHUNKS = json_array_chunks('users', recommender.user_ids)
+    if msgpack is not None:
+        _USERS_MSGPACK_CHUNKS = msgpack_array_chunks('users', recommender.user_ids)
+    
+    # Users grouped by activity level (number of rated items, read from the CSR row
+    # offsets), most active first with ties in user id order
+    rating_counts = recommender.user_item_matrix.getnnz(axis=1)
+    order = np.argsort(-rating_counts, kind='stable')
+    ranked_users, ranked_counts = recommender.user_ids[order], rating_counts[order]
+    _USER_TIERS = {
+        'high': ranked_users[ranked_counts >= 10],
+        'medium': ranked_users[(ranked_counts >= 5) & (ranked_counts < 10)],
+        'regular': ranked_users[(ranked_counts >= 2) & (ranked_counts < 5)],
+        'all': ranked_users
+    }
+
+@dataclass(frozen=True)
+class SearchRequest:
+    """Validated body of a /api/search request"""
+    query: str = ''
+    category: str = ''
+    brand: str = ''
+    limit: int = 20
+    
+    @staticmethod
+    def _text(data: dict, field: str) -> str:
+        """A string field with surrounding whitespace removed ('' when missing or null)"""
+        value = data.get(field)
+        if value is None:
+            return ''
+        if not isinstance(value, str):
+            raise ValueError(f"'{field}' must be a string")
+        return value.strip()
+    
+    @classmethod
+    def from_json(cls, body: bytes) -> "SearchRequest":
+        """
+        Parse and validate a raw JSON request body
+        
+        Raises:
+            ValueError: If the body is not a JSON object or a field has the wrong type
+        """
+        data = orjson.loads(body) if orjson is not None else json.loads(body)
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        
+        limit = data.get('limit', 20)
+        if isinstance(limit, bool) or not isinstance(limit, int):
+            raise ValueError("'limit' must be an integer")
+        
+        return cls(
+            query=cls._text(data, 'query'),
+            category=cls._text(data, 'category'),
+            brand=cls._text(data, 'brand'),
+            limit=limit
+        )
+    
+    def to_query_params(self) -> dict:
+        """Query parameters for AmazonSearchEngine.advanced_search (empty fields omitted)"""
+        query_params = {}
+        if self.query:
+            query_params['text'] = self.query
+        if self.category:
+            query_params['category'] = self.category
+        if self.brand:
+            query_params['brand'] = self.brand
+        query_params['limit'] = self.limit
+        return query_params
+
+# Bumped whenever the systems are (re)loaded; part of every result-cache key
+_DATA_GENERATION = 0
+
+@functools.lru_cache(maxsize=1024)
+def best_seller_records(generation: int, category: str, n: int) -> tuple:
+    """Best-seller response records for (category, n), computed once per data generation"""
+    results = search_engine.get_best_sellers(category=category, n=n)
+    if results.empty:
+        return ()
+    
+    # Build the description column-wise
+    rating_text = np.char.mod(' | Rating: %.1f/5', results['avg_rating'].to_numpy(dtype=np.float64))
+    description = (
+        "Product ID: " + results['product_id'].astype(str) +
+        " | Category: " + results['category'].astype(str) +
+        np.where(results['avg_rating'] > 0, rating_text, "")
+    )
+    
+    # Convert each column to Python values in one pass, then zip them into row records
+    columns = {
+        'product_id': results['product_id'].tolist(),
+        'title': results['title'].tolist(),
+        'description': description.tolist(),
+        'category': results['category'].tolist(),
+        'brand': results['brand'].tolist(),
+        'price': results['price'].astype('float64').tolist(),
+        'avg_rating': results['avg_rating'].astype('float64').tolist(),
+        'num_reviews': results['num_reviews'].astype('int64').tolist(),
+        'popularity_score': (results['popularity_score'].astype('float64').tolist()
+                             if 'popularity_score' in results.columns else [0.0] * len(results))
+    }
+    records = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    
+    return tuple(records)
+
+@functools.lru_cache(maxsize=512)
+def best_sellers_json(generation: int, category: str, n: int) -> bytes:
+    """Encoded JSON body of the best-sellers response for (category, n)"""
+    return encode_json({'results': list(best_seller_records(generation, category, n))})
+
+@functools.lru_cache(maxsize=4096)
+def user_recommendations(generation: int, user_id: str, n: int) -> tuple:
+    """Recommendations for a known user, computed once per data generation"""
+    return tuple(recommender.recommend_for_user(customer_id=user_id, n_recommendations=n))
+
+@functools.lru_cache(maxsize=4096)
+def user_recommendations_json(generation: int, user_id: str, n: int) -> bytes:
+    """Encoded JSON body of the recommendations response for a known user"""
+    return encode_json({'recommendations': list(user_recommendations(generation, user_id, n))})
+
+def data_fingerprint() -> str:
+    """Short hash identifying the loaded data, identical across worker processes"""
+    digest = hashlib.blake2b(digest_size=8)
+    for value in (
+        len(search_engine.products_df),
+        len(search_engine.reviews_df),
+        search_engine.products_df['total_reviews'].sum(),
+        search_engine.reviews_df['rating'].sum(),
+        recommender.user_item_matrix.nnz
+    ):
+        digest.update(f"{value}|".encode())
+    return digest.hexdigest()
 
 def init_systems():
     """Initialize search and recommendation systems"""
-    global search_engine, recommender
+    global search_engine, recommender, _DATA_GENERATION, _DATA_ETAG, _systems_initialized
     try:
         logger.info("Initializing search engine...")
         search_engine = AmazonSearchEngine()
         logger.info("Initializing recommendation system...")
         recommender = CollaborativeFilteringRecommender()
+        # Compile the recommender kernels now rather than on the first request
+        recommender_scoring.warm_up()
+        logger.info("Precomputing API aggregates...")
+        precompute_aggregates()
+        # Results computed from previously loaded data no longer apply
+        _DATA_GENERATION += 1
+        best_seller_records.cache_clear()
+        best_sellers_json.cache_clear()
+        user_recommendations.cache_clear()
+        user_recommendations_json.cache_clear()
+        with _gzip_cache_lock:
+            _gzip_cache.clear()
+        _DATA_ETAG = data_fingerprint()
+        # Refill the analytics response cache so the first page view does not compute it
+        response_cache.clear_local()
+        with app.test_request_context('/api/analytics'):
+            api_analytics()
         logger.info("✅ Systems initialized successfully")
     except Exception as e:
         logger.error(f"❌ Error initializing systems: {str(e)}")
         search_engine = None
         recommender = None
+        _DATA_ETAG = None
+    _systems_initialized = True
+
+def ensure_systems_initialized():
+    """Run init_systems() once per process, even when called from concurrent threads"""
+    if _systems_initialized:
+        return
+    with _init_lock:
+        if not _systems_initialized:
+            with app.app_context():
+                init_systems()
+
+def _is_conditional_get() -> bool:
+    """Whether the current request may be answered from the client's cached copy"""
+    return (_DATA_ETAG is not None and request.method == 'GET' and
+            request.endpoint in CONDITIONAL_GET_ENDPOINTS)
+
+def wants_gzip() -> bool:
+    """Whether the client accepts gzip-encoded responses"""
+    return bool(request.accept_encodings['gzip'])
+
+def _set_validators(response, etag: str):
+    """Attach an ETag and let clients reuse the response for client_max_age seconds"""
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = CACHE_CONFIG['client_max_age']
+
+def _representation_etag(gzipped: bool) -> str:
+    """
+    Data ETag for a representation of the current request's response
+    
+    Args:
+        gzipped: Whether the body is (or was) sent with Content-Encoding: gzip
+        
+    Returns:
+        The data ETag, suffixed for msgpack and gzip representations
+    """
+    etag = f"{_DATA_ETAG}-msgpack" if wants_msgpack() else _DATA_ETAG
+    return f"{etag}-gzip" if gzipped else etag
+
+@app.before_request
+def initialize_systems():
+    """Load the data on the first request when nothing initialized it at startup"""
+    ensure_systems_initialized()
+
+@app.before_request
+def check_not_modified():
+    """Answer 304 Not Modified, skipping the handler, when the client has the current data"""
+    if not _is_conditional_get():
+        return None
+    
+    # Whether a body is gzipped depends on its size, so either tag may be current; a
+    # gzipped copy only counts for clients that still accept gzip
+    for gzipped in ((False, True) if wants_gzip() else (False,)):
+        etag = _representation_etag(gzipped)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+            _set_validators(response, etag)
+            return response
+    return None
+
+@app.after_request
+def add_data_etag(response):
+    """Stamp successful read-only API responses with the data ETag"""
+    if response.status_code == 200 and _is_conditional_get():
+        # compress_response has already run (after_request handlers run in reverse order)
+        _set_validators(response, _representation_etag(response.headers.get('Content-Encoding') == 'gzip'))
+    return response
+
+@app.after_request
+def vary_on_accept(response):
+    """API responses are negotiated between JSON and msgpack on the Accept header"""
+    if msgpack is not None and request.path.startswith('/api/'):
+        response.vary.add('Accept')
+    return response
+
+COMPRESSIBLE_MIMETYPES = {'application/json', MSGPACK_MIMETYPE, 'text/html'}
+
+def gzip_body(body: bytes) -> bytes:
+    """Gzip a response body (without a timestamp, so equal bodies compress identically)"""
+    return gzip.compress(body, compresslevel=WEB_CONFIG['compress_level'], mtime=0)
+
+def gzip_stream(chunks):
+    """Gzip a streamed body chunk by chunk, so the whole body is never held compressed"""
+    compressor = zlib.compressobj(WEB_CONFIG['compress_level'], zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+# Compressed bodies of responses that only change when the data is reloaded, keyed on
+# (data generation, request path, mimetype) so the uncompressed bodies are not kept
+_gzip_cache = {}
+_gzip_cache_lock = threading.Lock()
+
+def cached_gzip_body(key: tuple, body: bytes) -> bytes:
+    """
+    Gzip a body that is the same for every request with this key, once per key
+    
+    Args:
+        key: Hashable key identifying the response representation
+        body: Uncompressed body, used when the key is not cached yet
+        
+    Returns:
+        The gzipped body
+    """
+    compressed = _gzip_cache.get(key)
+    if compressed is None:
+        compressed = gzip_body(body)
+        with _gzip_cache_lock:
+            if key not in _gzip_cache and len(_gzip_cache) >= 64:
+                # Drop the oldest entry (dicts keep insertion order)
+                del _gzip_cache[next(iter(_gzip_cache))]
+            _gzip_cache[key] = compressed
+    return compressed
+
+@app.after_request
+def compress_response(response):
+    """Gzip larger JSON and HTML responses for clients that accept it"""
+    if (response.status_code != 200 or response.direct_passthrough or
+            'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    if not wants_gzip():
+        return response
+    
+    if response.is_streamed:
+        # Streamed bodies are large; compress them as they are sent
+        response.response = gzip_stream(response.response)
+        response.headers.pop('Content-Length', None)
+        response.headers['Content-Encoding'] = 'gzip'
+        return response
+    
+    body = response.get_data()
+    if len(body) < WEB_CONFIG['compress_min_size']:
+        return response
+    
+    # Templates are re-rendered when auto-reloading, so pages are only cached otherwise
+    stable = (request.endpoint in CONDITIONAL_GET_ENDPOINTS or
+              (request.endpoint in STATIC_PAGE_ENDPOINTS and not app.jinja_env.auto_reload))
+    if stable:
+        response.set_data(cached_gzip_body((_DATA_GENERATION, request.full_path, response.mimetype), body))
+    else:
+        response.set_data(gzip_body(body))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+@functools.lru_cache(maxsize=None)
+def _rendered_page(name: str) -> str:
+    """HTML of a template rendered once per process"""
+    return render_template(name)
+
+def static_page(name: str) -> str:
+    """
+    Render a page template that takes no per-request variables
+    
+    Args:
+        name: Template file name
+        
+    Returns:
+        The rendered HTML, cached unless templates are being auto-reloaded (debug mode)
+    """
+    if app.jinja_env.auto_reload:
+        return render_template(name)
+    return _rendered_page(name)
 
 @app.route('/')
 def home():
     """Home page"""
-    return render_template('index.html')
+    return static_page('index.html')
 
 @app.route('/search')
 def search_page():
     """Search page"""
-    return render_template('search.html')
+    return static_page('search.html')
 
 @app.route('/recommendations')
 def recommendations_page():
     """Recommendations page"""
-    return render_template('recommendations.html')
+    return static_page('recommendations.html')
 
 @app.route('/analytics')
 def analytics_page():
     """Analytics page"""
-    return render_template('analytics.html')
+    return static_page('analytics.html')
 
 @app.route('/api/search', methods=['POST'])
 def api_search():
     """API endpoint for product search"""
     if not search_engine:
-        return jsonify({'error': 'Search engine not available'}), 503
+        return api_json({'error': 'Search engine not available'}, 503)
+    
+    try:
+        search_request = SearchRequest.from_json(request.get_data())
+    except ValueError as e:
+        return api_json({'error': str(e)}, 400)
     
     try:
-        data = request.json
-        query_text = data.get('query', '')
-        category = data.get('category', '')
-        brand = data.get('brand', '')
-        limit = data.get('limit', 20)
-        
-        # Prepare query parameters for advanced search
-        query_params = {}
-        
-        if query_text:
-            query_params['text'] = query_text
-        if category:
-            query_params['category'] = category
-        if brand:
-            query_params['brand'] = brand
-        
-        query_params['limit'] = limit
-        
         # Perform search
-        results = search_engine.advanced_search(query_params)
-        
-        # Convert to JSON-serializable format
-        results_list = []
-        for _, row in results.iterrows():
-            results_list.append({
-                'product_id': row.get('asin', ''),  # Use asin as product_id
-                'title': row.get('title', ''),
-                'category': row.get('group', ''),  # Use group as category
-                'brand': 'Amazon',  # Default brand since not available in dataset
-                'avg_rating': float(row.get('avg_rating', 0)),
-                'num_reviews': int(row.get('total_reviews', 0)),
-                'description': row.get('title', ''),  # Use title as description
-            })
+        results = search_engine.advanced_search(search_request.to_query_params())
+        
+        # Convert each column to Python values once, then zip them into row records
+        titles = results['title'].tolist()
+        columns = {
+            'product_id': results['asin'].tolist(),  # Use asin as product_id
+            'title': titles,
+            'category': results['group'].tolist(),  # Use group as category
+            'brand': ['Amazon'] * len(results),  # Default brand since not available in dataset
+            'avg_rating': results['avg_rating'].astype('float64').tolist(),
+            'num_reviews': results['total_reviews'].astype('int64').tolist(),
+            'description': titles,  # Use title as description
+        }
+        results_list = [dict(zip(columns, row)) for row in zip(*columns.values())]
         
-        return jsonify({
+        return api_json({
             'results': results_list,
             'total_count': len(results_list)
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_json({'error': str(e)}, 500)
 
 @app.route('/api/best_sellers/<category>')
 def api_best_sellers(category):
     """API endpoint for best sellers by category"""
     if not search_engine:
-        return jsonify({'error': 'Search engine not available'}), 503
+        return api_json({'error': 'Search engine not available'}, 503)
     
     try:
         n = request.args.get('n', 10, type=int)
-        results = search_engine.get_best_sellers(category=category, n=n)
-        
-        results_list = []
-        for _, row in results.iterrows():
-            results_list.append({
-                'product_id': row['product_id'],
-                'title': row['title'],
-                'description': f"Product ID: {row['product_id']} | Category: {row['category']}" + (f" | Rating: {row['avg_rating']:.1f}/5" if row['avg_rating'] > 0 else ""),
-                'category': row['category'],
-                'brand': row['brand'],
-                'price': float(row['price']),
-                'avg_rating': float(row['avg_rating']),
-                'num_reviews': int(row['num_reviews']),
-                'popularity_score': float(row.get('popularity_score', 0))
-            })
+        if wants_msgpack():
+            return api_json({'results': best_seller_records(_DATA_GENERATION, category, n)})
         
-        return jsonify({'results': results_list})
+        return app.response_class(best_sellers_json(_DATA_GENERATION, category, n), mimetype='application/json')
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_json({'error': str(e)}, 500)
 
 @app.route('/api/recommendations/<user_id>')
 def api_recommendations(user_id):
     """API endpoint for user recommendations"""
     if not recommender:
-        return jsonify({'error': 'Recommender system not available'}), 503
+        return api_json({'error': 'Recommender system not available'}, 503)
     
     try:
         method = request.args.get('method', 'item_based')
         n = request.args.get('n', 10, type=int)
         
-        recommendations = recommender.recommend_for_user(
-            customer_id=user_id,
-            n_recommendations=n
-        )
+        if user_id not in recommender._user_positions:
+            # Cold-start picks are randomised, so they are not cached
+            recommendations = recommender.recommend_for_user(
+                customer_id=user_id,
+                n_recommendations=n
+            )
+            return api_json({'recommendations': recommendations})
         
-        return jsonify({'recommendations': recommendations})
+        if wants_msgpack():
+            return api_json({'recommendations': user_recommendations(_DATA_GENERATION, user_id, n)})
+        return app.response_class(user_recommendations_json(_DATA_GENERATION, user_id, n),
+                                  mimetype='application/json')
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_json({'error': str(e)}, 500)
 
 @app.route('/api/co_purchasing/<user_id>')
 def api_co_purchasing(user_id):
     """API endpoint for co-purchasing analysis"""
     if not recommender:
-        return jsonify({'error': 'Recommender system not available'}), 503
+        return api_json({'error': 'Recommender system not available'}, 503)
     
     try:
-        # Get user's purchase history
-        user_reviews = recommender.reviews_df[
-            recommender.reviews_df['customer_id'] == user_id
-        ]
+        # Purchase history and co-buyer counts from the recommender's review index
+        co_purchases = recommender.customer_co_purchases(user_id)
+        user_products = co_purchases['products']
         
-        if len(user_reviews) == 0:
-            return jsonify({
+        if len(user_products) == 0:
+            return api_json({
                 'error': f'No purchase history found for user {user_id}',
                 'total_purchases': 0,
                 'co_purchasers_count': 0,
@@ -187,264 +730,182 @@ def api_co_purchasing(user_id):
                 'top_co_purchasers': {}
             })
         
-        user_products = user_reviews['product_asin'].unique()
         total_purchases = len(user_products)
         
-        # Find other users who bought the same products
-        co_purchasers = set()
+        # Other buyers per product, and products shared with the user per other buyer
+        product_co_buyers = pd.Series(co_purchases['co_buyers'], index=user_products)
+        shared_products = co_purchases['shared_products']
+        
+        # Co-purchased items by frequency (ties keep purchase order), with product details
         co_purchased_items = []
-        product_co_buyers = {}
-        
-        for product_asin in user_products[:10]:  # Limit to first 10 products to avoid timeout
-            # Find other users who bought this product
-            other_buyers = recommender.reviews_df[
-                (recommender.reviews_df['product_asin'] == product_asin) &
-                (recommender.reviews_df['customer_id'] != user_id)
-            ]['customer_id'].unique()
-            
-            product_co_buyers[product_asin] = len(other_buyers)
-            co_purchasers.update(other_buyers[:50])  # Limit to avoid memory issues
-            
-            # Get product info
+        for product_asin, frequency in product_co_buyers.sort_values(ascending=False, kind='stable').items():
             product_info = recommender._get_product_info(product_asin)
             if product_info:
-                product_info['co_purchase_frequency'] = len(other_buyers)
+                product_info['co_purchase_frequency'] = int(frequency)
                 co_purchased_items.append(product_info)
+                if len(co_purchased_items) == 20:  # Limit to top 20
+                    break
         
-        # Count shared purchases between users
-        top_co_purchasers = {}
-        for other_user in list(co_purchasers)[:20]:  # Limit to top 20 co-purchasers
-            shared_products = recommender.reviews_df[
-                (recommender.reviews_df['customer_id'] == other_user) &
-                (recommender.reviews_df['product_asin'].isin(user_products))
-            ]['product_asin'].nunique()
-            
-            if shared_products > 1:  # Only include users with multiple shared purchases
-                top_co_purchasers[other_user] = int(shared_products)
-        
-        # Sort co-purchased items by frequency
-        co_purchased_items.sort(key=lambda x: x.get('co_purchase_frequency', 0), reverse=True)
-        
-        # Sort top co-purchasers
-        top_co_purchasers = dict(sorted(top_co_purchasers.items(), key=lambda x: x[1], reverse=True)[:10])
+        # Top co-purchasers: only users with multiple shared purchases, ties by user id
+        top_co_purchasers = (shared_products[shared_products > 1].sort_index()
+                             .sort_values(ascending=False, kind='stable').head(10))
         
-        return jsonify({
+        return api_json({
             'user_id': user_id,
-            'total_purchases': int(total_purchases),
-            'co_purchasers_count': len(co_purchasers),
-            'co_purchased_items': co_purchased_items[:20],  # Limit to top 20
-            'top_co_purchasers': top_co_purchasers
+            'total_purchases': total_purchases,
+            'co_purchasers_count': len(shared_products),
+            'co_purchased_items': co_purchased_items,
+            'top_co_purchasers': {str(user): int(count) for user, count in top_co_purchasers.items()}
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_json({'error': str(e)}, 500)
 
 @app.route('/api/categories')
 def api_categories():
     """API endpoint for available categories"""
     if not search_engine:
-        return jsonify({'error': 'Search engine not available'}), 503
+        return api_json({'error': 'Search engine not available'}, 503)
     
-    try:
-        # Get categories from the 'group' field and their counts
-        categories = search_engine.products_df['group'].value_counts()
-        category_list = [
-            {'name': category, 'count': int(count)} 
-            for category, count in categories.items()
-        ]
-        return jsonify({'categories': category_list})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    if wants_msgpack():
+        return app.response_class(_CATEGORIES_MSGPACK, mimetype=MSGPACK_MIMETYPE)
+    return app.response_class(_CATEGORIES_JSON, mimetype='application/json')
 
 @app.route('/api/users')
 def api_users():
     """API endpoint for all user IDs"""
     if not recommender:
-        return jsonify({'error': 'Recommender system not available'}), 503
+        return api_json({'error': 'Recommender system not available'}, 503)
     
-    try:
-        # Get all users who have ratings data
-        users = recommender.user_item_matrix.index.tolist()
-        return jsonify({'users': users})
-        
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+    # Stream the chunks encoded at startup rather than building one body per request
+    if wants_msgpack():
+        return app.response_class(iter(_USERS_MSGPACK_CHUNKS), mimetype=MSGPACK_MIMETYPE)
+    return app.response_class(iter(_USERS_JSON_CHUNKS), mimetype='application/json')
 
 @app.route('/api/users/random')
 def api_random_users():
     """API endpoint for random user IDs"""
     if not recommender:
-        return jsonify({'error': 'Recommender system not available'}), 503
+        return api_json({'error': 'Recommender system not available'}, 503)
     
     try:
-        import random
-        # Get users with different activity levels based on rating counts
-        user_rating_counts = (recommender.user_item_matrix > 0).sum(axis=1).sort_values(ascending=False)
+        # Activity tiers are precomputed at startup; fall back to the most active users
+        ranked_users = _USER_TIERS['all']
         
-        # Get users from different activity tiers
-        high_activity_users = user_rating_counts[user_rating_counts >= 10].index.tolist()
-        medium_activity_users = user_rating_counts[(user_rating_counts >= 5) & (user_rating_counts < 10)].index.tolist()
-        regular_users = user_rating_counts[(user_rating_counts >= 2) & (user_rating_counts < 5)].index.tolist()
+        def pick(tier: str, fallback: int) -> str:
+            users = _USER_TIERS[tier]
+            return users[_user_sampler.integers(len(users))] if len(users) else ranked_users[fallback]
         
         # Select random users from each tier
-        return jsonify({
-            'high_activity': random.choice(high_activity_users) if high_activity_users else user_rating_counts.index[0],
-            'medium_activity': random.choice(medium_activity_users) if medium_activity_users else user_rating_counts.index[1],
-            'regular_user': random.choice(regular_users) if regular_users else user_rating_counts.index[2],
-            'sample_user': random.choice(high_activity_users) if high_activity_users else user_rating_counts.index[0],
+        return api_json({
+            'high_activity': pick('high', 0),
+            'medium_activity': pick('medium', 1),
+            'regular_user': pick('regular', 2),
+            'sample_user': pick('high', 0),
             'all_random': [
-                random.choice(high_activity_users) if high_activity_users else user_rating_counts.index[0],
-                random.choice(medium_activity_users) if medium_activity_users else user_rating_counts.index[1],
-                random.choice(regular_users) if regular_users else user_rating_counts.index[2]
-            ] + random.sample(user_rating_counts.index.tolist(), min(7, len(user_rating_counts)))
+                pick('high', 0),
+                pick('medium', 1),
+                pick('regular', 2)
+            ] + _user_sampler.choice(ranked_users, size=min(7, len(ranked_users)), replace=False).tolist()
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return api_json({'error': str(e)}, 500)
 
 @app.route('/api/stats')
 def api_stats():
     """API endpoint for system statistics"""
     if not search_engine or not recommender:
-        return jsonify({'error': 'Systems not available'}), 503
+        return api_json({'error': 'Systems not available'}, 503)
     
-    try:
-        total_products = len(search_engine.products_df)
-        total_ratings = len(search_engine.reviews_df) 
-        total_users = search_engine.reviews_df['customer_id'].nunique()
-        
-        # Format numbers for display
-        def format_number(num):
-            if num >= 1_000_000:
-                return f"{num / 1_000_000:.1f}M"
-            elif num >= 1_000:
-                return f"{num / 1_000:.0f}K"
-            else:
-                return str(num)
-        
-        stats = {
-            'total_products': total_products,
-            'total_ratings': total_ratings,
-            'total_users': total_users,
-            'categories': search_engine.products_df['main_category'].nunique() if 'main_category' in search_engine.products_df.columns else 0,
-            'avg_rating': float(search_engine.reviews_df['rating'].mean()),
-            # Formatted versions for display
-            'total_products_formatted': format_number(total_products),
-            'total_users_formatted': format_number(total_users),
-            'total_ratings_formatted': format_number(total_ratings),
-        }
-        
-        return jsonify(stats)
-        
-    except Exception as e:
-        logger.error(f"Error in /api/stats: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+    return api_json(_STATS_CACHE)
 
 @app.route('/api/analytics')
+@cached("static")
 def api_analytics():
     """API endpoint for detailed analytics data"""
     if not search_engine or not recommender:
-        return jsonify({'error': 'Systems not available'}), 503
+        return api_json({'error': 'Systems not available'}, 503)
     
     try:
         # Get category distribution from the 'group' column (the correct one)
         category_counts = search_engine.products_df['group'].value_counts().head(10)
-        total_products = len(search_engine.products_df)
+        total_products = _DATASET_SCALARS['total_products']
+        total_reviews = _DATASET_SCALARS['total_ratings']
+        total_users = _DATASET_SCALARS['total_users']
         
         # Filter and group categories - only show significant categories (>= 1%)
-        top_categories = []
-        other_count = 0
-        other_percentage = 0
-        
-        for category, count in category_counts.items():
-            if pd.notna(category):
-                percentage = round((count / total_products) * 100, 1)
-                # Only include categories with at least 1% of products
-                if percentage >= 1.0:
-                    top_categories.append({
-                        'name': str(category),
-                        'count': int(count),
-                        'percentage': percentage
-                    })
-                else:
-                    # Group small categories into "Others"
-                    other_count += count
-                    other_percentage += percentage
-        
-        # Add "Others" category if there are small categories
+        category_percentages = (category_counts / total_products * 100).round(1)
+        significant = (category_percentages >= 1.0).to_numpy()
+        top_categories = [
+            {'name': str(category), 'count': count, 'percentage': percentage}
+            for category, count, percentage in zip(
+                category_counts.index[significant],
+                category_counts[significant].astype('int64').tolist(),
+                category_percentages[significant].tolist()
+            )
+        ]
+        
+        # Group small categories into "Others"
+        other_count = int(category_counts[~significant].sum())
         if other_count > 0:
             top_categories.append({
                 'name': 'Others',
-                'count': int(other_count),
-                'percentage': round(other_percentage, 1)
+                'count': other_count,
+                'percentage': round(sum(category_percentages[~significant].tolist()), 1)
             })
         
         # Sort by count (largest first)
         top_categories.sort(key=lambda x: x['count'], reverse=True)
         
         # Calculate real user engagement metrics
-        reviews_per_user = search_engine.reviews_df.groupby('customer_id')['rating'].count()
+        reviews_per_user = search_engine.reviews_df.groupby('customer_id', observed=True)['rating'].count()
         avg_reviews_per_user = round(reviews_per_user.mean(), 1)
         
         # Rating distribution
         rating_counts = search_engine.reviews_df['rating'].value_counts().sort_index()
-        rating_distribution = []
-        for rating, count in rating_counts.items():
-            rating_distribution.append({
-                'rating': int(rating),
-                'count': int(count),
-                'percentage': round((count / len(search_engine.reviews_df)) * 100, 1)
-            })
+        rating_percentages = (rating_counts / total_reviews * 100).round(1)
+        rating_distribution = [
+            {'rating': rating, 'count': count, 'percentage': percentage}
+            for rating, count, percentage in zip(
+                rating_counts.index.astype('int64').tolist(),
+                rating_counts.astype('int64').tolist(),
+                rating_percentages.tolist()
+            )
+        ]
         
         # Product metrics
-        products_with_reviews = search_engine.reviews_df['product_id'].nunique()
+        products_with_reviews = _DATASET_SCALARS['products_with_reviews']
         coverage_rate = round((products_with_reviews / total_products) * 100, 1)
         
         # Price distribution based on sales rank (estimate pricing tiers)
         # Lower sales rank = higher popularity/potentially higher price
-        price_distribution = []
-        products_with_rank = search_engine.products_df[
-            (search_engine.products_df['salesrank'] > 0) & 
-            (search_engine.products_df['salesrank'] != float('inf'))
-        ]
+        # Only the valid ranks are needed, as a plain array rather than a copy of the product rows
+        products_df = search_engine.products_df
+        ranks = products_df['salesrank'].to_numpy(dtype=np.float64)[products_df['salesrank_valid'].to_numpy(dtype=bool)]
         
-        if len(products_with_rank) > 1000:  # Ensure we have enough data
+        if len(ranks) > 1000:  # Ensure we have enough data
             # Use non-uniform percentiles to create realistic price distribution
             # Most products should be in lower price ranges (typical Amazon distribution)
-            rank_percentiles = products_with_rank['salesrank'].quantile([0, 0.01, 0.05, 0.15, 0.35, 0.65, 1.0])
+            rank_edges = np.quantile(ranks, [0, 0.01, 0.05, 0.15, 0.35, 0.65, 1.0])
             
-            # Lower sales rank = higher price, so we map accordingly
-            # Most products have high sales ranks (lower popularity) = lower prices
-            price_ranges = [
-                ('$0-25', rank_percentiles[0.65], rank_percentiles[1.0]),     # 35% - budget items (high ranks)
-                ('$25-50', rank_percentiles[0.35], rank_percentiles[0.65]),   # 30% - lower mid-range
-                ('$50-75', rank_percentiles[0.15], rank_percentiles[0.35]),   # 20% - mid-range
-                ('$75-100', rank_percentiles[0.05], rank_percentiles[0.15]),  # 10% - upper mid-range
-                ('$100-150', rank_percentiles[0.01], rank_percentiles[0.05]), # 4% - premium
-                ('$150+', rank_percentiles[0.0], rank_percentiles[0.01])      # 1% - luxury (best sellers)
-            ]
+            # Lower sales rank = higher price, so the buckets run from luxury (best sellers,
+            # the lowest 1% of ranks) to budget items (the highest 35% of ranks)
+            price_ranges = ['$150+', '$100-150', '$75-100', '$50-75', '$25-50', '$0-25']
             
-            for price_range, min_rank, max_rank in price_ranges:
-                if price_range == '$150+':
-                    # Premium products have lowest sales ranks (most popular)
-                    count = len(products_with_rank[
-                        (products_with_rank['salesrank'] >= min_rank) & 
-                        (products_with_rank['salesrank'] <= max_rank)
-                    ])
-                else:
-                    # Regular ranges
-                    count = len(products_with_rank[
-                        (products_with_rank['salesrank'] > min_rank) & 
-                        (products_with_rank['salesrank'] <= max_rank)
-                    ])
-                price_distribution.append({
-                    'range': price_range,
-                    'count': int(count)
-                })
+            # Bucket every rank in one pass: [e0, e1], (e1, e2], ..., (e5, e6]. Quantile edges
+            # can repeat (tied ranks), which pd.cut rejects; repeated edges just give empty buckets
+            buckets = np.searchsorted(rank_edges, ranks, side='left') - 1
+            counts = np.bincount(np.maximum(buckets, 0), minlength=len(rank_edges))
+            
+            # Report the ranges cheapest first
+            price_distribution = [
+                {'range': price_range, 'count': int(count)}
+                for price_range, count in reversed(list(zip(price_ranges, counts)))
+            ]
         else:
             # Fallback with realistic distribution based on typical Amazon pricing
-            total_with_rank = len(products_with_rank) if len(products_with_rank) > 0 else 100000
+            total_with_rank = len(ranks) or 100000
             price_distribution = [
                 {'range': '$0-25', 'count': int(total_with_rank * 0.35)},    # 35% budget items
                 {'range': '$25-50', 'count': int(total_with_rank * 0.30)},   # 30% lower mid-range
@@ -456,9 +917,9 @@ def api_analytics():
         
         analytics = {
             'user_metrics': {
-                'total_users': search_engine.reviews_df['customer_id'].nunique(),
+                'total_users': total_users,
                 'avg_reviews_per_user': avg_reviews_per_user,
-                'total_reviews': len(search_engine.reviews_df),
+                'total_reviews': total_reviews,
                 'coverage_rate': coverage_rate
             },
             'top_categories': top_categories,
@@ -467,37 +928,37 @@ def api_analytics():
             'product_metrics': {
                 'total_products': total_products,
                 'products_with_reviews': products_with_reviews,
-                'avg_rating': round(search_engine.reviews_df['rating'].mean(), 2),
-                'total_categories': search_engine.products_df['main_category'].nunique()
+                'avg_rating': round(_DATASET_SCALARS['avg_rating'], 2),
+                'total_categories': _DATASET_SCALARS['categories']
             },
             'system_metrics': {
-                'data_sparsity': round(100 - (len(search_engine.reviews_df) / (search_engine.reviews_df['customer_id'].nunique() * products_with_reviews) * 100), 2),
+                'data_sparsity': round(100 - (total_reviews / (total_users * products_with_reviews) * 100), 2),
                 'memory_usage': '~2GB',
                 'dataset_size': '548K products, 7.6M reviews'
             }
         }
         
-        return jsonify(analytics)
+        return api_json(analytics)
         
     except Exception as e:
         logger.error(f"Error in /api/analytics: {str(e)}")
-        return jsonify({'error': str(e)}), 500
+        return api_json({'error': str(e)}, 500)
 
 # Error handlers for production
 @app.errorhandler(404)
 def not_found_error(error):
-    return render_template('index.html'), 404
+    return static_page('index.html'), 404
 
 @app.errorhandler(500)
 def internal_error(error):
     logger.error(f"Internal server error: {str(error)}")
-    return jsonify({'error': 'Internal server error'}), 500
+    return api_json({'error': 'Internal server error'}, 500)
 
 # Performance Dashboard Routes
 @app.route('/dashboard')
 def performance_dashboard():
     """Display the performance dashboard"""
-    return render_template('dashboard.html')
+    return static_page('dashboard.html')
 
 @app.route('/api/dashboard')
 def get_dashboard_data():
@@ -505,28 +966,28 @@ def get_dashboard_data():
     try:
         dashboard.update_system_metrics()
         data = dashboard.get_dashboard_data()
-        return jsonify(data)
+        return api_json(data)
     except Exception as e:
         logger.error(f"Error getting dashboard data: {str(e)}")
-        return jsonify({'error': 'Failed to retrieve dashboard data'}), 500
+        return api_json({'error': 'Failed to retrieve dashboard data'}, 500)
 
 @app.route('/api/dashboard/export')
 def export_dashboard_metrics():
     """Export dashboard metrics to JSON"""
     try:
         filepath = dashboard.export_metrics()
-        return jsonify({
+        return api_json({
             'status': 'success',
             'filepath': filepath,
             'message': 'Metrics exported successfully'
         })
     except Exception as e:
         logger.error(f"Error exporting metrics: {str(e)}")
-        return jsonify({'error': 'Failed to export metrics'}), 500
+        return api_json({'error': 'Failed to export metrics'}, 500)
 
 if __name__ == '__main__':
     print("🚀 Starting Amazon Recommender System Web Application...")
-    init_systems()
+    ensure_systems_initialized()
     
     # Force port 5000 to match the frontend
     port = 5000
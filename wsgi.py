@@ -0,0 +1,18 @@
+"""
+WSGI entry point for production servers
+
+Usage:
+    gunicorn wsgi:application    # settings are read from gunicorn.conf.py
+"""
+import os
+
+from web.app import app, ensure_systems_initialized
+
+# Load the data when the module is imported so that, with gunicorn's
+# preload_app, workers fork after initialization and share the loaded
+# DataFrames copy-on-write. Set INIT_SYSTEMS_ON_IMPORT=false to skip it;
+# each worker then loads the data on its first request instead.
+if os.environ.get('INIT_SYSTEMS_ON_IMPORT', 'true').lower() == 'true':
+    ensure_systems_initialized()
+
+application = app